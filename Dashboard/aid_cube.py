@@ -0,0 +1,62 @@
+# aid_cube.py
+# Pre-aggregated financial aid totals for the Financial Aid tab.
+#
+# The raw rows are summed once into cells keyed by donor x aid_type_general x
+# year_month. Every chart and callback in the tab reads a rollup of those cells
+# (a few hundred rows, however large the extract) instead of grouping the raw
+# data again. The donor ranking is sorted once, so the top/bottom donor
+# dropdown is a slice.
+import pandas as pd
+
+VALUE = 'tot_activity_value_EUR'
+MONTHS = [
+    'January', 'February', 'March', 'April', 'May', 'June',
+    'July', 'August', 'September', 'October', 'November', 'December'
+]
+
+
+class AidCube:
+    """Aid totals by donor x aid type x month, with the rollups the tab uses."""
+
+    def __init__(self, df):
+        year_month = df['announcement_date'].dt.to_period('M').astype(str)
+        # dropna=False keeps rows without an aid type in the donor/month totals
+        self.cells = (
+            df.assign(year_month=year_month)
+            .groupby(['donor', 'aid_type_general', 'year_month'], observed=True, dropna=False)[VALUE]
+            .sum()
+        )
+
+        # --- Rollups ---
+        self.by_month = self.cells.groupby(level='year_month').sum()
+        month_names = pd.to_datetime(self.by_month.index).month_name()
+        self.by_calendar_month = self.by_month.groupby(month_names).sum().reindex(MONTHS)
+        self.by_donor = self.cells.groupby(level='donor', observed=True).sum()
+        self.by_type_donor = self.cells.groupby(level=['aid_type_general', 'donor'], observed=True).sum()
+        self.by_type_month = self.cells.groupby(level=['aid_type_general', 'year_month'], observed=True).sum()
+        self.by_type = self.by_type_donor.groupby(level='aid_type_general', observed=True).sum()
+
+        # Descending; ties keep donor order
+        self.donor_ranking = self.by_donor.sort_values(ascending=False, kind='stable')
+
+    def top_donors(self, n=10):
+        return self.donor_ranking.iloc[:n]
+
+    def bottom_donors(self, n=10):
+        """The n smallest donors, smallest first."""
+        return self.donor_ranking.iloc[::-1].iloc[:n]
+
+    def by_type_before(self, year_month):
+        """Aid per type in months before ``year_month`` ('YYYY-MM')."""
+        months = self.by_type_month.index.get_level_values('year_month')
+        return self.by_type_month[months < year_month].groupby(level='aid_type_general', observed=True).sum()
+
+    def by_type_since(self, year_month):
+        months = self.by_type_month.index.get_level_values('year_month')
+        return self.by_type_month[months >= year_month].groupby(level='aid_type_general', observed=True).sum()
+
+    def top_donor_per_type(self):
+        """(aid_type_general, donor, total) of the largest donor in each aid type."""
+        per_type = self.by_type_donor.reset_index()
+        idx = per_type.groupby('aid_type_general', observed=True)[VALUE].idxmax()
+        return per_type.loc[idx]
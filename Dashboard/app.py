@@ -8,15 +8,25 @@
 #     └── economic.py
 
 # === app.py ===
+import startup_profile
+startup_profile.install()  # before the other imports, so they are timed too
+
 from dash import Dash
 from layout import create_layout
 from callbacks import register_callbacks
+from figure_cache import register_routes
+import callback_metrics
 
 app = Dash(__name__, suppress_callback_exceptions=True)
 app.title = "Russia vs Ukraine Dashboard"
-app.layout = create_layout(app)
+with startup_profile.timed('layout', 'create_layout'):
+    app.layout = create_layout(app)
 
 register_callbacks(app)
+register_routes(app.server)
+callback_metrics.register(app)
+startup_profile.register_routes(app.server)
+startup_profile.boot_finished()
 
 if __name__ == '__main__':
     app.run(debug=True)
@@ -0,0 +1,322 @@
+# benchmark.py
+# Reproducible timings and payload sizes for the dashboard.
+#
+# Measured:
+#   - cold import time of the app and of each section module, each in a fresh
+#     interpreter (on-disk caches such as the Arrow datasets stay warm, as
+#     they are on a deployed server)
+#   - create_layout construction time
+#   - latency of the server-side callbacks through the Flask test client: the
+#     median of callback_cache misses, and the median / p95 of repeats
+#   - serialized size of every figure each tab ships, of the forecast figure
+#     served from /figures, and of the callback responses
+#   - size and encode time of the largest figures as plain Plotly JSON versus
+#     the typed-array encoding the sections ship (figure_encoding.py)
+#
+# update_destroyed_numbers now runs in the browser (see callbacks.py), so it
+# has no server latency; the typed-array store it decodes is sized instead.
+#
+# Results are written to benchmark_results.json and compared with
+# benchmark_baseline.json. A payload more than SIZE_TOLERANCE larger than the
+# baseline is a regression, and so is a timing more than TIME_TOLERANCE (and
+# NOISE_MS) slower, after both are scaled by the machine's speed: every run
+# times a fixed calibration workload at its start and end, and the baseline
+# timings are scaled by the ratio of the two runs' calibrations, so a loaded
+# or slower machine does not fail the whole suite. A timing that still looks
+# slower is measured again, and only timings slower in both runs count. Any
+# regression sets exit status 1. Re-save the baseline after hardware changes
+# all the same, as the scaling is approximate.
+#
+#   python benchmark.py                  run and compare with the baseline
+#   python benchmark.py --save-baseline  run and store the results as the baseline
+import importlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from layout import TABS
+
+os.environ.setdefault('DASHBOARD_CACHE', 'memory')  # comparable cache behaviour between runs
+
+RESULTS_PATH = 'benchmark_results.json'
+BASELINE_PATH = 'benchmark_baseline.json'
+IMPORT_RUNS = 3
+MISS_RUNS = 5
+REPEATS = 20
+TIME_TOLERANCE = 0.25
+NOISE_MS = 5.0
+SIZE_TOLERANCE = 0.05
+
+IMPORT_MODULES = ['app'] + [module for _, _, module, _ in TABS]
+
+# name -> (output, inputs for each repeat i)
+CALLBACKS = {
+    'update_economic_plot': ('indicator-lineplot.figure', lambda i: [
+        {'id': 'indicator-dropdown', 'property': 'value', 'value': 'NY.GDP.MKTP.CD'},
+        {'id': 'country-dropdown', 'property': 'value', 'value': ['RUS', 'UKR']},
+    ]),
+    'update_donor_chart': ('donor-bar-chart.figure', lambda i: [
+        {'id': 'donor-sort-dropdown', 'property': 'value', 'value': ('top', 'bottom')[i % 2]},
+    ]),
+    'update_loss_ratio': ('loss-ratio-graph.figure', lambda i: [
+        {'id': 'date-slider', 'property': 'value', 'value': i * 37 % 1000},
+    ]),
+}
+
+# name -> (section module, builder, args) for the JSON vs typed-array comparison
+ENCODED_FIGURES = {
+    'loss_ratio': ('sections.equipment_losses', 'build_ratio_figure', ()),
+    'cumulative_loss': ('sections.equipment_losses', 'build_cumulative_figure', ()),
+    'forecast': ('sections.forecast_layout', 'build_forecast_figure', ()),
+    'equipment_weekly': ('sections.russian_losses', 'build_equipment_figure', ('W',)),
+}
+
+_IMPORT_SNIPPET = (
+    "import sys, time; t = time.perf_counter(); __import__(sys.argv[1]); "
+    "print(time.perf_counter() - t)"
+)
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 2)
+
+
+def cold_imports():
+    """{module: median ms to import it in a fresh interpreter}."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    result = {}
+    for module in IMPORT_MODULES:
+        runs = [float(subprocess.run([sys.executable, '-c', _IMPORT_SNIPPET, module], cwd=here,
+                                     capture_output=True, text=True, check=True).stdout)
+                for _ in range(IMPORT_RUNS)]
+        result[module] = _ms(statistics.median(runs))
+    return result
+
+
+def _median_ms(func):
+    runs = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = func()
+        runs.append(time.perf_counter() - start)
+    return _ms(statistics.median(runs)), result
+
+
+def _calibration_work():
+    # Fixed mix of interpreter, JSON and NumPy work, like the dashboard's own
+    values = np.random.default_rng(0).random(100_000)
+    np.sort(values)
+    json.dumps(values[:10_000].tolist())
+    sum(i * i for i in range(50_000))
+
+
+def calibrate():
+    """Median ms of the calibration workload on this machine, right now."""
+    return _median_ms(_calibration_work)[0]
+
+
+def time_create_layout(app):
+    from layout import create_layout
+    return _median_ms(lambda: create_layout(app))[0]
+
+
+def _post(client, output, inputs):
+    body = {
+        'output': output,
+        'outputs': {'id': output.split('.')[0], 'property': output.split('.')[1]},
+        'inputs': inputs,
+        'changedPropIds': [f"{i['id']}.{i['property']}" for i in inputs],
+    }
+    start = time.perf_counter()
+    response = client.post('/_dash-update-component', json=body)
+    elapsed = time.perf_counter() - start
+    if response.status_code != 200:
+        raise RuntimeError(f'{output}: HTTP {response.status_code}')
+    return elapsed, len(response.data), response
+
+
+def _figures(component, found):
+    # Walk a serialized component tree for Graph figures
+    if isinstance(component, list):
+        for child in component:
+            _figures(child, found)
+    elif isinstance(component, dict):
+        props = component.get('props', {})
+        if component.get('type') == 'Graph' and props.get('figure'):
+            key = props.get('id') or f'graph-{len(found)}'
+            found[key] = len(json.dumps(props['figure'], separators=(',', ':')))
+        _figures(props.get('children'), found)
+
+
+def tab_payloads(client):
+    """({tab: response bytes}, {tab/graph: figure bytes}) for every tab."""
+    tabs, figures = {}, {}
+    for value, _, _, _ in TABS:
+        _, size, response = _post(client, 'tab-content.children',
+                                  [{'id': 'main-tabs', 'property': 'value', 'value': value}])
+        tabs[value] = size
+        found = {}
+        _figures(response.get_json()['response']['tab-content']['children'], found)
+        figures.update({f'{value}/{graph}': size for graph, size in found.items()})
+    return tabs, figures
+
+
+def served_figures(client):
+    from figure_cache import FIGURE_MODULES, figure_url
+    sizes = {}
+    for name, module_name in FIGURE_MODULES.items():
+        key, _ = importlib.import_module(module_name).figure_json()
+        sizes[name] = len(client.get(figure_url(name, key)).data)
+    return sizes
+
+
+def _miss(client, output, inputs):
+    # An empty cache for each call, so memoized callbacks run their body
+    import callback_cache
+    callback_cache.backend = callback_cache.MemoryBackend()
+    return _post(client, output, inputs)
+
+
+def callback_latencies(client):
+    result = {}
+    for name, (output, inputs) in CALLBACKS.items():
+        misses = [_miss(client, output, inputs(0)) for _ in range(MISS_RUNS)]
+        runs = [_post(client, output, inputs(i))[0] for i in range(1, REPEATS + 1)]
+        size = misses[0][1]
+        result[name] = {
+            'miss_ms': _ms(statistics.median(elapsed for elapsed, _, _ in misses)),
+            'median_ms': _ms(statistics.median(runs)),
+            'p95_ms': _ms(sorted(runs)[int(0.95 * (len(runs) - 1))]),
+            'response_bytes': size,
+        }
+    from sections.equipment_losses import counter_store
+    result['update_destroyed_numbers'] = {
+        'clientside': True,
+        'store_bytes': len(json.dumps(counter_store(), separators=(',', ':'))),
+    }
+    return result
+
+
+def encoding_comparison():
+    import plotly.io as pio
+    from figure_encoding import encoded_json
+    result = {}
+    for name, (module_name, builder, args) in ENCODED_FIGURES.items():
+        fig = getattr(importlib.import_module(module_name), builder)(*args)
+        json_ms, plain = _median_ms(lambda: pio.to_json(fig))
+        binary_ms, binary = _median_ms(lambda: encoded_json(fig))
+        result[name] = {
+            'json_bytes': len(plain), 'json_ms': json_ms,
+            'binary_bytes': len(binary), 'binary_ms': binary_ms,
+        }
+    return result
+
+
+def run():
+    import dash
+    import plotly
+    calibration_start = calibrate()
+    results = {
+        'environment': {
+            'python': platform.python_version(),
+            'dash': dash.__version__,
+            'plotly': plotly.__version__,
+            'machine': platform.machine(),
+            'cache_backend': os.environ['DASHBOARD_CACHE'],
+            'repeats': REPEATS,
+        },
+        'import_ms': cold_imports(),
+    }
+    import app
+    client = app.app.server.test_client()
+    results['create_layout_ms'] = time_create_layout(app.app)
+    # Tabs first: section imports are measured above, not in the callback timings
+    results['tab_bytes'], results['figure_bytes'] = tab_payloads(client)
+    results['figure_bytes'].update({f'served/{name}': size for name, size in served_figures(client).items()})
+    results['callbacks'] = callback_latencies(client)
+    results['encoding'] = encoding_comparison()
+    results['environment']['calibration_ms'] = round(statistics.mean([calibration_start, calibrate()]), 2)
+    return results
+
+
+def _metrics(results, prefix=''):
+    # Flatten to {'callbacks.update_loss_ratio.median_ms': value, ...}
+    flat = {}
+    for key, value in results.items():
+        if key == 'environment':
+            continue
+        name = f'{prefix}{key}'
+        if isinstance(value, dict):
+            flat.update(_metrics(value, name + '.'))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def _is_size(name):
+    return name.endswith('bytes') or '_bytes.' in name
+
+
+def _speed_ratio(results, baseline):
+    # > 1 when this run's machine was slower than the baseline's
+    current = results['environment'].get('calibration_ms')
+    previous = baseline.get('environment', {}).get('calibration_ms')
+    return current / previous if current and previous else 1.0
+
+
+def compare(results, baseline):
+    """{metric: line describing the regression} against ``baseline`` (empty if none)."""
+    current, previous = _metrics(results), _metrics(baseline)
+    scale = _speed_ratio(results, baseline)
+    regressions = {}
+    for name, value in sorted(current.items()):
+        if name not in previous:
+            continue
+        before = previous[name]
+        if _is_size(name):
+            worse = value > before * (1 + SIZE_TOLERANCE)
+        else:
+            expected = before * scale
+            worse = value > expected * (1 + TIME_TOLERANCE) and value - expected > NOISE_MS
+            before = f'{before} (x{scale:.2f} = {expected:.2f})' if scale != 1.0 else before
+        if worse:
+            regressions[name] = f'{name}: {before} -> {value}'
+    return regressions
+
+
+def _write(path, results):
+    with open(path + '.tmp', 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+
+if __name__ == '__main__':
+    results = run()
+    _write(RESULTS_PATH, results)
+    for name, value in sorted(_metrics(results).items()):
+        print(f'{name:60} {value}')
+
+    if '--save-baseline' in sys.argv[1:]:
+        _write(BASELINE_PATH, results)
+        print(f'saved baseline to {BASELINE_PATH}')
+    elif os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline)
+        if any(not _is_size(name) for name in regressions):
+            # Confirm slower timings with a second run; one-off stalls do not repeat
+            print('timings slower than the baseline; measuring again')
+            retry = compare(run(), baseline)
+            regressions = {name: retry[name] for name in regressions if name in retry}
+        for line in regressions.values():
+            print('REGRESSION', line)
+        print(f'{len(regressions)} regressions against {BASELINE_PATH}')
+        sys.exit(1 if regressions else 0)
+    else:
+        print('no baseline yet; run with --save-baseline to store one')
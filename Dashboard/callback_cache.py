@@ -0,0 +1,226 @@
+# callback_cache.py
+# Memoization for deterministic Dash callbacks.
+#
+# Callbacks that rebuild a figure from read-only data are wrapped with
+# @memoize(<registry sources>). The cache key is the callback's name, its
+# inputs and the version (content hash) of the data it reads. Identical
+# selections from any user are therefore served from the cache, and a changed
+# CSV never serves stale figures.
+#
+# The backend is picked with environment variables:
+#   DASHBOARD_CACHE        memory (default) | filesystem | redis | none
+#   DASHBOARD_CACHE_TTL    seconds an entry stays valid (default 3600, 0 = forever)
+#   DASHBOARD_CACHE_SIZE   max entries in memory (default 256), or max MB on disk (default 64)
+#   DASHBOARD_CACHE_DIR    directory for the filesystem backend (default callback_cache)
+#   DASHBOARD_REDIS_URL    for the redis backend (default redis://localhost:6379/0);
+#                          any server speaking the Redis protocol works, and size
+#                          limits come from its maxmemory / allkeys-lru policy
+import functools
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from plotly.basedatatypes import BaseFigure
+
+from data_registry import source_hash
+
+try:
+    import redis
+except ImportError:  # the redis backend is optional
+    redis = None
+
+
+# --- Backends: get(key) -> (hit, value), set(key, value) ---
+
+class MemoryBackend:
+    """In-process LRU with a per-entry TTL."""
+
+    def __init__(self, max_entries=256, ttl=3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires, value)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            expires, value = entry
+            if expires and expires < time.time():
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl if self.ttl else 0, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+_FileEntry = namedtuple('_FileEntry', 'expires value')
+
+
+class FileBackend:
+    """Pickled entries on disk, shared by every process on the machine.
+
+    Entries older than the TTL are misses; the directory is trimmed to
+    ``max_bytes`` by access time, as in forecast_service. The expiry is stored
+    in the entry itself, since marking a file as used changes its timestamps.
+    """
+
+    def __init__(self, directory='callback_cache', max_bytes=64 << 20, ttl=3600):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.pickle')
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                entry = pickle.load(f)
+            if entry.expires and entry.expires < time.time():
+                os.remove(path)
+                return False, None
+            os.utime(path)  # mark as recently used
+        except (OSError, EOFError, AttributeError, pickle.UnpicklingError):
+            return False, None  # missing, expired meanwhile, or unreadable
+        return True, entry.value
+
+    def set(self, key, value):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        entry = _FileEntry(time.time() + self.ttl if self.ttl else 0, value)
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.pickle'):
+                st = entry.stat()
+                entries.append((st.st_mtime, st.st_size, entry.path))
+        entries.sort(reverse=True)
+        total = 0
+        for _, size, path in entries:
+            total += size
+            if total > self.max_bytes:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+class RedisBackend:
+    """Entries in a Redis(-compatible) server, expired by the server."""
+
+    def __init__(self, url='redis://localhost:6379/0', ttl=3600, prefix='dashboard:'):
+        if redis is None:
+            raise RuntimeError("DASHBOARD_CACHE=redis needs the 'redis' package")
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        data = self.client.get(self.prefix + key)
+        if data is None:
+            return False, None
+        return True, pickle.loads(data)
+
+    def set(self, key, value):
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        self.client.set(self.prefix + key, data, ex=self.ttl or None)
+
+
+def backend_from_env(environ=os.environ):
+    kind = environ.get('DASHBOARD_CACHE', 'memory')
+    ttl = int(environ.get('DASHBOARD_CACHE_TTL', 3600))
+    size = environ.get('DASHBOARD_CACHE_SIZE')
+    if kind == 'none':
+        return None
+    if kind == 'memory':
+        return MemoryBackend(int(size or 256), ttl)
+    if kind == 'filesystem':
+        return FileBackend(environ.get('DASHBOARD_CACHE_DIR', 'callback_cache'),
+                           int(size or 64) << 20, ttl)
+    if kind == 'redis':
+        return RedisBackend(environ.get('DASHBOARD_REDIS_URL', 'redis://localhost:6379/0'), ttl)
+    raise ValueError(f"unknown DASHBOARD_CACHE backend {kind!r}")
+
+
+# --- Decorator ---
+
+backend = backend_from_env()
+stats = {}  # callback name -> {'hits': n, 'misses': n}
+# outcome.result: 'hit' / 'miss' of the latest memoized call on this thread
+# (read by callback_metrics; Dash runs callbacks in a copied context, so a
+# ContextVar set here would not be visible after the request)
+outcome = threading.local()
+
+
+def _version(sources):
+    # Sources are registry names, or callables for data that lives elsewhere
+    parts = [str(s()) if callable(s) else source_hash(s) for s in sources]
+    return hashlib.sha256('|'.join(parts).encode()).hexdigest()[:16]
+
+
+def _plain(value):
+    # Figures unpickle slowly (every property goes through plotly's validators);
+    # the dict form is what Dash serializes anyway
+    if isinstance(value, BaseFigure):
+        return value.to_plotly_json()
+    if isinstance(value, tuple):
+        return tuple(_plain(v) for v in value)
+    return value
+
+
+def memoize(*sources, vary_on=None):
+    """Cache a callback's return value by its inputs and the version of ``sources``.
+
+    ``vary_on(*args)`` picks the inputs that matter for the key (default: all
+    of them), e.g. ``vary_on=lambda _: ()`` for a callback that ignores its
+    trigger. The data version is computed once per process, as the data itself
+    is loaded once per process.
+    """
+    def decorate(func):
+        name = f'{func.__module__}.{func.__qualname__}'
+        counters = stats.setdefault(name, {'hits': 0, 'misses': 0})
+
+        @functools.cache
+        def version():
+            return _version(sources)
+
+        @functools.wraps(func)
+        def wrapper(*args):
+            if backend is None:
+                return func(*args)
+            key_args = vary_on(*args) if vary_on is not None else args
+            payload = json.dumps([name, version(), key_args], sort_keys=True, default=str)
+            key = hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+            hit, value = backend.get(key)
+            if hit:
+                counters['hits'] += 1
+                outcome.result = 'hit'
+                return value
+            counters['misses'] += 1
+            outcome.result = 'miss'
+            value = _plain(func(*args))
+            backend.set(key, value)
+            return value
+
+        return wrapper
+    return decorate
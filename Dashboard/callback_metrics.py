@@ -0,0 +1,169 @@
+# callback_metrics.py
+# Latency and payload metrics for every server-side callback, at /metrics.
+#
+# All server-side callbacks, including ones registered later, reach the server
+# through Dash's /_dash-update-component route. register() therefore
+# instruments that route on the Flask server instead of each callback. Per
+# callback it records:
+#   - wall time and CPU time (of the request thread),
+#   - request and response payload bytes,
+#   - callback_cache hits and misses (see callback_cache.outcome).
+# Values go into fixed log-spaced histograms: one lock, one bisect and one
+# increment per observation, and constant memory however many calls are made.
+#
+# /metrics serves them in the Prometheus text format, as summaries with
+# p50/p95/p99 interpolated within the buckets (error well under one bucket,
+# about 19%). Clientside callbacks never reach the server and are not counted.
+import bisect
+import re
+import threading
+import time
+
+from flask import Response, g, request
+
+import callback_cache
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Histogram:
+    """Counts in log-spaced buckets between ``low`` and ``high``, with quantile estimates."""
+
+    def __init__(self, low, high, per_doubling=4):
+        self.bounds = []
+        bound = low
+        while bound < high:
+            self.bounds.append(bound)
+            bound *= 2 ** (1 / per_doubling)
+        self.bounds.append(high)
+        self.counts = [0] * (len(self.bounds) + 1)  # last bucket: above high
+        self.count = 0
+        self.sum = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.sum += value
+            self.min = min(self.min, value)
+            self.max = max(self.max, value)
+
+    def quantile(self, q):
+        with self._lock:
+            counts, count, lowest, highest = list(self.counts), self.count, self.min, self.max
+        if not count:
+            return float('nan')
+        rank = q * count
+        seen = 0
+        for i, n in enumerate(counts):
+            if n and seen + n >= rank:
+                lower = self.bounds[i - 1] if i > 0 else 0.0
+                upper = self.bounds[i] if i < len(self.bounds) else highest
+                lower, upper = max(lower, lowest), min(upper, highest)
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return highest
+
+
+# metric name -> (help text, histogram factory)
+METRICS = {
+    'dashboard_callback_wall_seconds': ('Wall time of a callback request.', lambda: Histogram(1e-5, 100)),
+    'dashboard_callback_cpu_seconds': ('CPU time of the request thread.', lambda: Histogram(1e-5, 100)),
+    'dashboard_callback_request_bytes': ('Callback request payload size.', lambda: Histogram(16, 1 << 30)),
+    'dashboard_callback_response_bytes': ('Callback response payload size.', lambda: Histogram(16, 1 << 30)),
+}
+
+_histograms = {}  # (metric, callback, output) -> Histogram
+_cache_results = {}  # (callback, output, 'hit' | 'miss') -> count
+_lock = threading.Lock()
+
+
+def _histogram(metric, labels):
+    key = (metric,) + labels
+    histogram = _histograms.get(key)
+    if histogram is None:
+        with _lock:
+            histogram = _histograms.setdefault(key, METRICS[metric][1]())
+    return histogram
+
+
+def observe(callback, output, wall, cpu, request_bytes, response_bytes, cache_result=None):
+    labels = (callback, output)
+    _histogram('dashboard_callback_wall_seconds', labels).observe(wall)
+    _histogram('dashboard_callback_cpu_seconds', labels).observe(cpu)
+    _histogram('dashboard_callback_request_bytes', labels).observe(request_bytes)
+    _histogram('dashboard_callback_response_bytes', labels).observe(response_bytes)
+    if cache_result is not None:
+        key = labels + (cache_result,)
+        with _lock:
+            _cache_results[key] = _cache_results.get(key, 0) + 1
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(callback, output, **extra):
+    pairs = [('callback', callback), ('output', output)] + list(extra.items())
+    return '{' + ','.join(f'{k}="{_escape(str(v))}"' for k, v in pairs) + '}'
+
+
+def render():
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric, (help_text, _) in METRICS.items():
+        lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} summary']
+        for (name, callback, output), histogram in sorted(_histograms.items()):
+            if name != metric:
+                continue
+            for q in QUANTILES:
+                lines.append(f'{metric}{_labels(callback, output, quantile=q)} {histogram.quantile(q):.6g}')
+            lines.append(f'{metric}_sum{_labels(callback, output)} {histogram.sum:.6g}')
+            lines.append(f'{metric}_count{_labels(callback, output)} {histogram.count}')
+    lines += ['# HELP dashboard_callback_cache_total callback_cache lookups by result.',
+              '# TYPE dashboard_callback_cache_total counter']
+    for (callback, output, result), n in sorted(_cache_results.items()):
+        lines.append(f'dashboard_callback_cache_total{_labels(callback, output, result=result)} {n}')
+    return '\n'.join(lines) + '\n'
+
+
+def _callback_ids(app):
+    # Dash callback id (request 'output') -> (function name, output without the duplicate-output hash)
+    return {output: (getattr(spec.get('callback'), '__name__', output), re.sub(r'@[0-9a-f]+', '', output))
+            for output, spec in app.callback_map.items()}
+
+
+def register(app):
+    """Instrument the callback route of ``app`` and serve /metrics on its Flask server."""
+    server = app.server
+    dispatch_path = app.config.routes_pathname_prefix + '_dash-update-component'
+    ids = {}
+
+    @server.before_request
+    def start_timer():
+        if request.path == dispatch_path:
+            callback_cache.outcome.result = None
+            g.callback_timer = (time.perf_counter(), time.thread_time())
+
+    @server.after_request
+    def record(response):
+        timer = g.pop('callback_timer', None)
+        if timer is None:
+            return response
+        wall, cpu = time.perf_counter() - timer[0], time.thread_time() - timer[1]
+        output = (request.get_json(silent=True) or {}).get('output', '')
+        if output not in ids:
+            ids.update(_callback_ids(app))
+        # Unknown ids share one label set, so junk requests cannot add series
+        callback, label = ids.get(output, ('unknown', 'unknown'))
+        observe(callback, label, wall, cpu, request.content_length or 0,
+                response.calculate_content_length() or 0, getattr(callback_cache.outcome, 'result', None))
+        return response
+
+    @server.route('/metrics')
+    def metrics():
+        return Response(render(), mimetype='text/plain; version=0.0.4')
@@ -1,24 +1,153 @@
-from dash import Input, Output
-from sections.economic import df_all_melted
+import importlib
+
+from dash import Input, Output, State
 import plotly.express as px
 
-# Import equipment section callback registrar
-from sections.equipment_losses import register_callbacks as register_equipment_callbacks
+from callback_cache import memoize
+from indicator_store import indicator_name, store_version
+from layout import render_tab
+
+
+def lazy_section_callback(module_name, func_name):
+    """Callback body that imports its section only when it first fires.
+
+    Dash needs every callback registered before the first request, but
+    importing a section loads its data and builds its figures. The wrapper
+    keeps registration cheap and defers that work to the section's tab.
+    """
+    def run(*args):
+        return getattr(importlib.import_module(module_name), func_name)(*args)
+    run.__name__ = func_name
+    return run
+
 
 def register_callbacks(app):
-    # Existing economic callback
+    # Tab content is rendered on demand and memoized in render_tab
+    @app.callback(
+        Output('tab-content', 'children'),
+        Input('main-tabs', 'value')
+    )
+    def update_tab(tab_value):
+        return render_tab(tab_value)
+
+    # Economic indicators are read from the memory-mapped indicator_store
     @app.callback(
         Output('indicator-lineplot', 'figure'),
-        Input('indicator-dropdown', 'value')
+        Input('indicator-dropdown', 'value'),
+        Input('country-dropdown', 'value')
     )
-    def update_economic_plot(indicator):
-        filtered = df_all_melted[df_all_melted['Indicator'] == indicator]
+    @memoize(store_version)
+    def update_economic_plot(indicator, countries):
+        from sections.economic import indicator_frame
         fig = px.line(
-            filtered, x='Year', y='Value', color='Country',
-            markers=True, title=indicator
+            indicator_frame(indicator, countries or []), x='Year', y='Value', color='Country',
+            markers=True, title=indicator_name(indicator)
         )
         fig.update_layout(title_x=0.5)
         return fig
 
-    # Register equipment callbacks here as well
-    register_equipment_callbacks(app)
+    # Forecast figure is fetched from its HTTP-cached URL (see figure_cache.py)
+    app.clientside_callback(
+        """
+        function(url) {
+            return fetch(url).then(function(response) { return response.json(); });
+        }
+        """,
+        Output('forecast-graph', 'figure'),
+        Input('forecast-figure-url', 'data')
+    )
+
+    # Other horizons come from cached ARIMA fits (see forecast_service.py)
+    app.callback(
+        Output('forecast-graph', 'figure', allow_duplicate=True),
+        Output('forecast-projected-rus', 'children'),
+        Output('forecast-projected-ukr', 'children'),
+        Input('forecast-horizon', 'value'),
+        prevent_initial_call=True
+    )(lazy_section_callback('sections.forecast_layout', 'update_forecast_horizon'))
+
+    # Financial aid callbacks
+    app.callback(
+        Output('donor-bar-chart', 'figure'),
+        Input('donor-sort-dropdown', 'value')
+    )(lazy_section_callback('sections.financialaid', 'update_donor_chart'))
+
+    app.callback(
+        Output('aid-time-graph', 'figure'),
+        Input('timeline-toggle', 'value')
+    )(lazy_section_callback('sections.financialaid', 'toggle_timeline'))
+
+    # Russian losses: aggregation levels are precomputed in rollups.py
+    app.callback(
+        Output('loss-graph', 'figure'),
+        Output('loss-graph-stack', 'figure'),
+        Output('equipment-category-graph', 'figure'),
+        Input('aggregation-dropdown', 'value'),
+        prevent_initial_call=True
+    )(lazy_section_callback('sections.russian_losses', 'update_aggregation'))
+
+    # Equipment counters: read from the typed array in 'equipment-counts' in the
+    # browser, so scrubbing the slider never reaches the server
+    app.clientside_callback(
+        """
+        function(index, store) {
+            var cache = window._equipmentCounts;
+            if (!cache || cache.data !== store.data) {
+                var bytes = Uint8Array.from(atob(store.data), function(c) { return c.charCodeAt(0); });
+                var ArrayType = store.dtype === 'int16' ? Int16Array : Int32Array;
+                cache = window._equipmentCounts = {
+                    data: store.data, values: new ArrayType(bytes.buffer), width: store.columns.length
+                };
+            }
+            var row = cache.values.subarray(index * cache.width, (index + 1) * cache.width);
+            var labels = ['Tanks', 'Aircraft', 'Artillery'];
+            var out = [];
+            [0, 3].forEach(function(side) {
+                for (var i = 0; i < 3; i++) {
+                    out.push(labels[i] + ' Destroyed: ' + row[side + i]);
+                }
+                out.push('Total Equipment Destroyed: ' + (row[side] + row[side + 1] + row[side + 2]));
+            });
+            return out;
+        }
+        """,
+        Output('russia-tanks-destroyed', 'children'),
+        Output('russia-aircraft-destroyed', 'children'),
+        Output('russia-artillery-destroyed', 'children'),
+        Output('russia-total-destroyed', 'children'),
+        Output('ukraine-tanks-destroyed', 'children'),
+        Output('ukraine-aircraft-destroyed', 'children'),
+        Output('ukraine-artillery-destroyed', 'children'),
+        Output('ukraine-total-destroyed', 'children'),
+        Input('date-slider', 'value'),
+        State('equipment-counts', 'data')
+    )
+
+    # The ratio figure ships with the layout; slider moves patch its cursor only
+    app.callback(
+        Output('loss-ratio-graph', 'figure'),
+        Input('date-slider', 'value'),
+        prevent_initial_call=True
+    )(lazy_section_callback('sections.equipment_losses', 'update_loss_ratio'))
+
+    # Long daily series ship LTTB-downsampled; zooming re-queries the visible
+    # window at full resolution (see downsample.py)
+    for graph_id, module_name, func_name in (
+        ('loss-ratio-graph', 'sections.equipment_losses', 'zoom_loss_ratio'),
+        ('cumulative-loss-graph', 'sections.equipment_losses', 'zoom_cumulative_loss'),
+        ('forecast-graph', 'sections.forecast_layout', 'zoom_forecast'),
+    ):
+        app.callback(
+            Output(graph_id, 'figure', allow_duplicate=True),
+            Input(graph_id, 'relayoutData'),
+            prevent_initial_call=True
+        )(lazy_section_callback(module_name, func_name))
+
+    # Civilian map: swap boundary detail level on zoom
+    app.callback(
+        Output('ukraine-map', 'figure'),
+        Output('ukraine-map-level', 'data'),
+        Input('ukraine-map', 'relayoutData'),
+        State('ukraine-map-level', 'data'),
+        prevent_initial_call=True
+    )(lazy_section_callback('sections.ukr_civilian_losses', 'update_map_detail'))
@@ -0,0 +1,323 @@
+# data_registry.py
+# Shared data access for every dashboard section.
+#
+# Each source is parsed from CSV once and cached next to the CSV as an
+# uncompressed Arrow IPC file. The cache is rebuilt only when the CSV's
+# mtime/size and content hash change. Every section gets the same frame object
+# back; treat it as read-only and derive new columns with .assign() or a copy.
+#
+# Cached frames are memory-mapped, not read: their numeric, date, string and
+# categorical columns are read-only views of the file's pages in the OS page
+# cache. Every process (e.g. each server worker) that loads a source maps the
+# same physical pages, so the data is held once per host, not once per worker.
+# share() does the same for frames derived at startup, through SHARED_DIR.
+#
+# Sources listed in SCHEMAS are parsed with declared column types instead of
+# read_csv inference: money columns with thousands separators and placeholder
+# tokens, categoricals and dates are all converted in one vectorized pass
+# (pyarrow.csv + pyarrow.compute), and the typed result is what gets cached.
+import contextlib
+import csv
+import hashlib
+import json
+import os
+import tempfile
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+    import pyarrow.ipc as pa_ipc
+except ImportError:  # fall back to plain CSV parsing without a cache
+    pyarrow = None
+
+from startup_profile import profiled
+
+# name -> (csv path relative to the Dashboard directory, read_csv kwargs)
+SOURCES = {
+    'equipment': (
+        '../Rus-Ukr-Equipment/ukr-rus-equipment_cleaned.csv',
+        {'parse_dates': ['Date']},
+    ),
+    'ukraine_civilians': ('../Rus-Ukr-Civilians/ukraine-civilian-preprocessed.csv', {}),
+    'russia_civilians': ('../Rus-Ukr-Civilians/russia-civilian-preprocessed.csv', {}),
+    'russian_personnel': (
+        '../Russian soldier and civilian losses/Confirmed Russian losses in Ukraine per week.csv',
+        {'parse_dates': ['week_start'], 'date_format': '%d.%m.%Y'},
+    ),
+    'financial_aid': ('../Financial-aid/financialaid.csv', {}),
+}
+
+# name -> typed parsing rules (column names are matched after stripping whitespace)
+#   numeric:    float64 columns; thousands separators removed, anything else non-numeric -> NaN
+#   categories: column -> None, or 'title' to title-case labels first
+#   dates:      column -> strptime format; unparseable -> NaT
+#   required:   rows missing any of these are dropped
+SCHEMAS = {
+    'financial_aid': {
+        'numeric': [
+            'tot_activity_value', 'tot_activity_value_EUR', 'tot_activity_value_constant_currency',
+            'tot_sub_activity_value', 'tot_sub_activity_value_EUR', 'tot_sub_activity_value_constant_currency',
+            'tot_sub_activity_value_constant_currency_redistr', 'tot_sub_activity_value_EUR_redistr',
+            'tot_value_deliv_EUR', 'tot_sub_activity_value_EUR_OLD',
+            'item_price_USD', 'item_value_estimate_USD', 'item_value_estimate_deliv_USD',
+        ],
+        'thousands': ',',
+        'na_values': ['.', '', 'nan', 'NaN'],
+        'categories': {'donor': None, 'aid_type_general': 'title', 'aid_type_specific': None},
+        'dates': {'announcement_date': '%Y-%m-%d'},
+        'required': ['donor', 'tot_activity_value_EUR', 'announcement_date'],
+    },
+}
+
+# Where share() publishes derived frames; tmpfs where available
+SHARED_DIR = os.environ.get('DASHBOARD_SHARED_DIR') or (
+    '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir())
+
+NUMBER_PATTERN = r'^[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?$'
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """Return the sha256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _cache_paths(csv_path):
+    stem, _ = os.path.splitext(csv_path)
+    return stem + '.arrow', stem + '.arrow.json'
+
+
+def _read_stamp(stamp_path):
+    # None when missing or unreadable, which callers treat as a stale cache
+    try:
+        with open(stamp_path) as f:
+            stamp = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return stamp if isinstance(stamp, dict) else None
+
+
+def _write_stamp(stamp_path, stamp):
+    # Replaced atomically: other processes may be reading it at startup
+    tmp_path = f'{stamp_path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(stamp, f)
+    os.replace(tmp_path, stamp_path)
+
+
+def _cache_is_fresh(csv_path, cache_path, stamp_path, schema_id=None):
+    if not os.path.exists(cache_path):
+        return False
+    stamp = _read_stamp(stamp_path)
+    if stamp is None:
+        return False
+    if stamp.get('schema') != schema_id:
+        return False
+    st = os.stat(csv_path)
+    if stamp.get('mtime_ns') == st.st_mtime_ns and stamp.get('size') == st.st_size:
+        return True
+    # Touched but possibly unchanged (e.g. a fresh checkout): compare contents
+    if stamp.get('sha256') != file_hash(csv_path):
+        return False
+    stamp.update(mtime_ns=st.st_mtime_ns, size=st.st_size)
+    _write_stamp(stamp_path, stamp)
+    return True
+
+
+def source_hash(name):
+    """sha256 of a source CSV, taken from the cache stamp when the file is unchanged."""
+    csv_path, _ = SOURCES[name]
+    _, stamp_path = _cache_paths(csv_path)
+    stamp = _read_stamp(stamp_path)
+    if stamp is not None:
+        st = os.stat(csv_path)
+        if stamp.get('mtime_ns') == st.st_mtime_ns and stamp.get('size') == st.st_size and stamp.get('sha256'):
+            return stamp['sha256']
+    return file_hash(csv_path)
+
+
+def _write_cache(df, csv_path, cache_path, stamp_path, schema_id=None):
+    st = os.stat(csv_path)
+    try:
+        write_arrow(df, cache_path)
+    except (ValueError, TypeError, OSError):
+        # Columns pyarrow cannot represent; serve from CSV instead
+        return False
+    _write_stamp(stamp_path, {'mtime_ns': st.st_mtime_ns, 'size': st.st_size,
+                              'sha256': file_hash(csv_path), 'schema': schema_id})
+    return True
+
+
+# --- Memory-mapped Arrow IPC ---
+
+def _arrow_column(series):
+    # NumPy numbers and dates go in as they are: from_pandas would turn NaN
+    # into nulls, and columns with nulls cannot come back as zero-copy views
+    if isinstance(series.dtype, np.dtype) and series.dtype.kind in 'biufM':
+        return pyarrow.array(series.to_numpy())
+    return pyarrow.Array.from_pandas(series)
+
+
+def write_arrow(df, path):
+    """Write the columns of ``df`` (not its index) to an uncompressed Arrow IPC file."""
+    table = pyarrow.table([_arrow_column(df[name]) for name in df.columns], names=[str(name) for name in df.columns])
+    # Write a new file and rename it over the old one: processes that have the
+    # old file mapped keep reading it, where rewriting in place would crash them
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with pyarrow.OSFile(tmp_path, 'wb') as sink, pa_ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp_path, path)
+
+
+def read_arrow(path):
+    """Memory-map an Arrow IPC file as a read-only frame backed by the mapped pages."""
+    table = pa_ipc.open_file(pyarrow.memory_map(path)).read_all()
+    # split_blocks keeps one block per column, so no column is copied into a 2-D block
+    return freeze(table.to_pandas(split_blocks=True))
+
+
+def share(df, name):
+    """Publish a frame built at startup to SHARED_DIR; returns a read-only, memory-mapped copy.
+
+    Processes forked afterwards (the server workers) inherit the mapping, so
+    they all read one copy of the data. The file is removed once mapped; its
+    pages live as long as a process maps them. Without pyarrow, or for frames
+    Arrow cannot hold, ``df`` itself is returned, frozen.
+    """
+    if pyarrow is None:
+        return freeze(df)
+    path = os.path.join(SHARED_DIR, f'dashboard-{name}-{os.getpid()}.arrow')
+    try:
+        write_arrow(df, path)
+        shared = read_arrow(path)
+    except (ValueError, TypeError, OSError):
+        return freeze(df)
+    finally:
+        with contextlib.suppress(OSError):
+            os.remove(path)
+    shared.index = df.index
+    return shared
+
+
+# --- Typed parsing ---
+
+def schema_id(schema):
+    """Short fingerprint of a schema, so editing it invalidates cached parses."""
+    return hashlib.sha256(json.dumps(schema, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def _header(csv_path):
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        return [name.strip() for name in next(csv.reader(f))]
+
+
+def _clean_strings(array, title=False):
+    array = pc.utf8_trim_whitespace(array)
+    if title:
+        array = pc.utf8_title(array)
+    return pc.if_else(pc.equal(array, ''), pyarrow.scalar(None, pyarrow.string()), array)
+
+
+def _to_number(array, thousands):
+    array = pc.replace_substring(pc.utf8_trim_whitespace(array), thousands, '')
+    valid = pc.match_substring_regex(array, NUMBER_PATTERN)
+    return pc.if_else(valid, array, pyarrow.scalar(None, pyarrow.string())).cast(pyarrow.float64())
+
+
+def _read_typed_arrow(csv_path, schema):
+    names = _header(csv_path)
+    typed = set(schema['numeric']) | set(schema['categories']) | set(schema['dates'])
+    table = pa_csv.read_csv(
+        csv_path,
+        read_options=pa_csv.ReadOptions(column_names=names, skip_rows=1),
+        parse_options=pa_csv.ParseOptions(newlines_in_values=True),  # multi-line notes
+        convert_options=pa_csv.ConvertOptions(
+            column_types={name: pyarrow.string() for name in names if name in typed},
+            null_values=schema['na_values'],
+            strings_can_be_null=True,
+        ),
+    )
+
+    columns = {}
+    for name in schema['numeric']:
+        columns[name] = _to_number(table[name], schema['thousands'])
+    for name, fmt in schema['dates'].items():
+        columns[name] = pc.strptime(_clean_strings(table[name]), format=fmt, unit='s', error_is_null=True)
+    for name, case in schema['categories'].items():
+        columns[name] = _clean_strings(table[name], title=case == 'title').dictionary_encode()
+    for name, column in columns.items():
+        table = table.set_column(table.schema.get_field_index(name), name, column)
+
+    keep = pc.is_valid(table[schema['required'][0]])
+    for name in schema['required'][1:]:
+        keep = pc.and_(keep, pc.is_valid(table[name]))
+    df = table.filter(keep).to_pandas()
+    # Dictionary order is first-seen; pandas sorts categories
+    for name in schema['categories']:
+        df[name] = df[name].cat.reorder_categories(sorted(df[name].cat.categories))
+    return df
+
+
+def _read_typed_pandas(csv_path, schema):
+    # Same rules with the pandas C parser, for installs without pyarrow
+    df = pd.read_csv(csv_path, dtype=str, keep_default_na=False)
+    df.columns = df.columns.str.strip()
+    na = schema['na_values']
+    for name in schema['numeric']:
+        values = df[name].str.strip().str.replace(schema['thousands'], '', regex=False)
+        df[name] = pd.to_numeric(values.where(~values.isin(na)), errors='coerce')
+    for name, fmt in schema['dates'].items():
+        df[name] = pd.to_datetime(df[name].str.strip(), format=fmt, errors='coerce')
+    for name, case in schema['categories'].items():
+        values = df[name].str.strip()
+        if case == 'title':
+            values = values.str.title()
+        df[name] = values.where(values != '').astype('category')
+    return df.dropna(subset=schema['required']).reset_index(drop=True)
+
+
+def read_typed_csv(csv_path, schema):
+    """Parse ``csv_path`` according to one of the SCHEMAS."""
+    if pyarrow is None:
+        return _read_typed_pandas(csv_path, schema)
+    return _read_typed_arrow(csv_path, schema)
+
+
+def freeze(df):
+    """Mark the NumPy buffers behind ``df`` read-only so in-place writes fail loudly."""
+    for block in df._mgr.blocks:
+        if isinstance(block.values, np.ndarray):
+            block.values.flags.writeable = False
+    return df
+
+
+@lru_cache(maxsize=None)
+@profiled('data')
+def load_dataset(name):
+    """Return the shared, read-only frame for one of the SOURCES."""
+    csv_path, read_kwargs = SOURCES[name]
+    schema = SCHEMAS.get(name)
+    if schema is not None:
+        parse = lambda: read_typed_csv(csv_path, schema)
+    else:
+        parse = lambda: pd.read_csv(csv_path, **read_kwargs)
+    if pyarrow is None:
+        return freeze(parse())
+
+    cache_path, stamp_path = _cache_paths(csv_path)
+    fingerprint = schema_id(schema) if schema is not None else None
+    if _cache_is_fresh(csv_path, cache_path, stamp_path, fingerprint):
+        return read_arrow(cache_path)
+
+    df = parse()
+    if _write_cache(df, csv_path, cache_path, stamp_path, fingerprint):
+        return read_arrow(cache_path)
+    return freeze(df)
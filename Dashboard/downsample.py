@@ -0,0 +1,140 @@
+# downsample.py
+# Largest-Triangle-Three-Buckets downsampling for long time-series traces.
+#
+# Figures ship at most DEFAULT_POINTS points per trace, so payload size and
+# browser render time stay flat however long the daily history grows. When the
+# user zooms, the graph's relayoutData is sent back, and zoom_patch
+# re-downsamples only the visible window from the full-resolution arrays (at
+# full resolution once the window holds fewer points than the budget). Outside
+# the window the patch keeps a coarse CONTEXT_POINTS overview, so panning or
+# zooming out shows the rest of the series until the next patch arrives.
+# Resetting the axes restores the overview. Figures using zoom_patch set a
+# constant layout.uirevision, so replacing their data keeps the user's axes.
+#
+# LTTB keeps the first and last points and, from each bucket in between, the
+# point forming the largest triangle with the point kept from the previous
+# bucket and the average of the next one. The choice is sequential from bucket
+# to bucket, but all of a bucket's triangle areas are computed in one NumPy
+# operation.
+import numpy as np
+import pandas as pd
+from dash import Patch, no_update
+
+from figure_encoding import typed_array
+
+DEFAULT_POINTS = 1500
+CONTEXT_POINTS = 200
+
+
+def _as_float(x):
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype('datetime64[ns]').astype('int64') / 1e9
+    return x.astype('float64')
+
+
+def lttb(x, y, n_out=DEFAULT_POINTS):
+    """Indices of the points LTTB keeps out of (x, y); x must be sorted.
+
+    Points where y is NaN are never kept.
+    """
+    x, y = _as_float(x), np.asarray(y, dtype='float64')
+    finite = np.flatnonzero(np.isfinite(y))
+    if len(finite) < len(y):
+        return finite[lttb(x[finite], y[finite], n_out)]
+    n = len(x)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+
+    # Interior points [1, n-1) split into n_out - 2 buckets [starts[b], ends[b])
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    starts, ends = edges[:-1], edges[1:]
+
+    # Average of the following bucket (the last point after the final bucket)
+    csum_x = np.concatenate([[0.0], np.cumsum(x)])
+    csum_y = np.concatenate([[0.0], np.cumsum(y)])
+    sizes = ends - starts
+    avg_x = np.append(((csum_x[ends] - csum_x[starts]) / sizes)[1:], x[-1])
+    avg_y = np.append(((csum_y[ends] - csum_y[starts]) / sizes)[1:], y[-1])
+
+    # Buckets as rows of a matrix, short rows padded with their own last point
+    cols = starts[:, None] + np.arange(sizes.max())[None, :]
+    cols = np.minimum(cols, ends[:, None] - 1)
+    bucket_x, bucket_y = x[cols], y[cols]
+
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    ax, ay = x[0], y[0]
+    for b in range(len(starts)):
+        area = np.abs((ax - avg_x[b]) * (bucket_y[b] - ay) - (ax - bucket_x[b]) * (avg_y[b] - ay))
+        j = cols[b, area.argmax()]
+        keep[b + 1] = j
+        ax, ay = x[j], y[j]
+    return keep
+
+
+def downsampled(x, y, n_out=DEFAULT_POINTS):
+    """(x, y) arrays reduced to at most n_out points."""
+    x, y = np.asarray(x), np.asarray(y)
+    idx = lttb(x, y, n_out)
+    return x[idx], y[idx]
+
+
+def _window(x, x_range):
+    """Index slice of sorted x inside x_range, plus one point either side."""
+    lo, hi = x_range
+    if np.issubdtype(x.dtype, np.datetime64):
+        lo, hi = pd.Timestamp(lo).to_datetime64(), pd.Timestamp(hi).to_datetime64()
+    else:
+        lo, hi = float(lo), float(hi)
+    start = max(np.searchsorted(x, lo, side='left') - 1, 0)
+    stop = min(np.searchsorted(x, hi, side='right') + 1, len(x))
+    return slice(start, stop)
+
+
+def visible_range(relayout_data, axis='xaxis'):
+    """'reset', (x0, x1) or None (this relayout did not change the x range)."""
+    if not relayout_data:
+        return None
+    if relayout_data.get(f'{axis}.autorange'):
+        return 'reset'
+    if f'{axis}.range[0]' in relayout_data:
+        return relayout_data[f'{axis}.range[0]'], relayout_data[f'{axis}.range[1]']
+    if f'{axis}.range' in relayout_data:
+        return tuple(relayout_data[f'{axis}.range'])
+    return None
+
+
+def _plain_dates(x):
+    # '2023-01-01' rather than '2023-01-01T00:00:00.000000' in patch payloads
+    if np.issubdtype(x.dtype, np.datetime64):
+        return np.datetime_as_string(x, unit='auto')
+    return x
+
+
+def _zoomed(x, y, x_range, n_out, context_points):
+    # Window at up to n_out points, the rest of the series at context_points
+    window = _window(x, x_range)
+    inside = window.start + lttb(x[window], y[window], n_out)
+    overview = lttb(x, y, context_points)
+    outside = overview[(overview < window.start) | (overview >= window.stop)]
+    idx = np.union1d(outside, inside)
+    return x[idx], y[idx]
+
+
+def zoom_patch(relayout_data, traces, n_out=DEFAULT_POINTS, context_points=CONTEXT_POINTS):
+    """Patch re-downsampling ``traces`` [(trace index, x, y), ...] for the visible x range."""
+    x_range = visible_range(relayout_data)
+    if x_range is None:
+        return no_update
+    patched = Patch()
+    for index, x, y in traces:
+        x, y = np.asarray(x), np.asarray(y)
+        if x_range == 'reset':
+            x, y = downsampled(x, y, n_out)
+        else:
+            x, y = _zoomed(x, y, x_range, n_out, context_points)
+        # Dates as short strings are about as small as base64 epoch milliseconds
+        patched['data'][index]['x'] = _plain_dates(x)
+        patched['data'][index]['y'] = typed_array(y) or y
+    return patched
@@ -0,0 +1,173 @@
+# equipment_series.py
+# Equipment loss series with its derived columns, maintained incrementally.
+#
+# Every derived value the equipment tab uses depends only on running sums or a
+# short trailing window, so a new day of data is ingested in O(new rows):
+#   - daily increases continue from the last Russia_Total / Ukraine_Total;
+#   - cumulative losses, totals and averages continue from running sums;
+#   - the centered 7-day ratio smoothing revises only the last 3 old rows,
+#     which were still waiting for the right half of their window.
+#
+# Ingested batches are stored as Parquet parts under STORE_DIR. Each part holds
+# its new rows plus the revised trailing rows, and later parts win on Date.
+# Ingest from the command line with `python equipment_series.py new_rows.csv`;
+# the CLI also streams the new days into the forecasts (forecast_service.absorb).
+import glob
+import json
+import os
+import shutil
+import sys
+from functools import lru_cache
+
+import pandas as pd
+
+from data_registry import load_dataset, share, source_hash
+from startup_profile import profiled
+
+STORE_DIR = '../Rus-Ukr-Equipment/ingested'
+SIDES = ('Russia', 'Ukraine')
+SMOOTH_WINDOW = 7
+HALF_WINDOW = SMOOTH_WINDOW // 2
+
+
+def _prepare(new_rows):
+    if isinstance(new_rows, (str, os.PathLike)):
+        new_rows = pd.read_csv(new_rows)
+    new = new_rows.copy()
+    new['Date'] = pd.to_datetime(new['Date'])
+    new = new.sort_values('Date', ignore_index=True)
+    if 'Ratio RU/UA' not in new:
+        new['Ratio RU/UA'] = new['Russia_Total'] / new['Ukraine_Total']
+    return new
+
+
+class EquipmentSeries:
+    """Loss series plus running state; ``append`` costs O(new rows)."""
+
+    def __init__(self, parts=None, state=None, tail=None):
+        self.parts = parts if parts is not None else []
+        self.state = state or {
+            'rows': 0,
+            'parts': 0,
+            'last_total': {side: None for side in SIDES},
+            'loss': {side: 0.0 for side in SIDES},
+        }
+        self.tail = tail  # last SMOOTH_WINDOW - 1 rows, derived columns included
+        self._pending = []
+        self._frame = None
+
+    @classmethod
+    def from_frame(cls, df):
+        series = cls()
+        series.append(df)
+        return series
+
+    def append(self, new_rows):
+        """Add rows dated after the current end; returns the rows written (revised + new)."""
+        new = _prepare(new_rows)
+        if self.tail is not None and len(self.tail) and new['Date'].iloc[0] <= self.tail['Date'].iloc[-1]:
+            raise ValueError("append() only accepts rows dated after the last ingested day")
+
+        state = self.state
+        for side in SIDES:
+            total = new[f'{side}_Total']
+            increase = total.diff()
+            prev = state['last_total'][side]
+            if prev is not None:
+                increase.iloc[0] = total.iloc[0] - prev
+            increase = increase.fillna(0).clip(lower=0)
+            cumulative = increase.cumsum() + state['loss'][side]
+            new[f'{side}_Daily_Increase'] = increase
+            new[f'{side}_Cumulative_Loss'] = cumulative
+            state['last_total'][side] = float(total.iloc[-1])
+            state['loss'][side] = float(cumulative.iloc[-1])
+        state['rows'] += len(new)
+
+        # Smooth over the old tail + new rows; only the last HALF_WINDOW old rows change
+        old_tail = self.tail if self.tail is not None else new.iloc[:0]
+        window = pd.concat([old_tail, new], ignore_index=True)
+        window['Ratio_RU_UA_Smoothed'] = window['Ratio RU/UA'].rolling(window=SMOOTH_WINDOW, center=True).mean()
+        revised = window.iloc[max(0, len(old_tail) - HALF_WINDOW):].reset_index(drop=True)
+        self.tail = window.iloc[-(SMOOTH_WINDOW - 1):].reset_index(drop=True)
+
+        self.parts.append(revised)
+        self._pending.append(revised)
+        self._frame = None
+        return revised
+
+    @property
+    def frame(self):
+        """Full series with derived columns (requires the parts to be loaded), in shared memory."""
+        if self._frame is None:
+            df = pd.concat(self.parts, ignore_index=True)
+            self._frame = share(df.drop_duplicates('Date', keep='last').reset_index(drop=True), 'equipment_series')
+        return self._frame
+
+    def total_loss(self, side):
+        return self.state['loss'][side]
+
+    def avg_daily_loss(self, side):
+        return self.state['loss'][side] / self.state['rows']
+
+    def save(self, store_dir=STORE_DIR):
+        """Write parts appended since the last save, plus the tail and running state."""
+        os.makedirs(store_dir, exist_ok=True)
+        for part in self._pending:
+            part.to_parquet(os.path.join(store_dir, f"part-{self.state['parts']:05d}.parquet"), index=False)
+            self.state['parts'] += 1
+        self._pending = []
+        self.tail.to_parquet(os.path.join(store_dir, 'tail.parquet'), index=False)
+        with open(os.path.join(store_dir, 'state.json'), 'w') as f:
+            json.dump(self.state, f, indent=1)
+
+
+def _read_state(store_dir):
+    path = os.path.join(store_dir, 'state.json')
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        state = json.load(f)
+    # The store extends one specific version of the base CSV
+    if state.get('base_sha256') != source_hash('equipment'):
+        return None
+    return state
+
+
+@lru_cache(maxsize=None)
+@profiled('data')
+def load_series(store_dir=STORE_DIR):
+    """The base equipment CSV plus every batch ingested since, with derived columns.
+
+    Cached per process, so every section reads (and shares) the same frame.
+    """
+    state = _read_state(store_dir)
+    if state is None:
+        return EquipmentSeries.from_frame(load_dataset('equipment'))
+    parts = [pd.read_parquet(p) for p in sorted(glob.glob(os.path.join(store_dir, 'part-*.parquet')))]
+    return EquipmentSeries(parts, state, pd.read_parquet(os.path.join(store_dir, 'tail.parquet')))
+
+
+def ingest(new_rows, store_dir=STORE_DIR):
+    """Append new days to the store without reading or recomputing the history."""
+    state = _read_state(store_dir)
+    if state is None:
+        # First ingest for this base CSV: derive it once as part 0
+        shutil.rmtree(store_dir, ignore_errors=True)
+        series = EquipmentSeries.from_frame(load_dataset('equipment'))
+        series.state['base_sha256'] = source_hash('equipment')
+    else:
+        series = EquipmentSeries(state=state, tail=pd.read_parquet(os.path.join(store_dir, 'tail.parquet')))
+    revised = series.append(new_rows)
+    series.save(store_dir)
+    load_series.cache_clear()
+    return revised
+
+
+if __name__ == '__main__':
+    from forecast_service import absorb
+    for path in sys.argv[1:]:
+        rows = ingest(path)
+        print(f"{path}: wrote {len(rows)} rows through {rows['Date'].iloc[-1].date()}")
+        refits = absorb(_prepare(path))
+        for side, reason in refits.items():
+            print(f"  {side} forecast: {'refitted (' + reason + ')' if reason else 'filter update'}")
@@ -0,0 +1,85 @@
+# figure_cache.py
+# Content-addressed on-disk cache for expensive figures.
+#
+# A figure is stored as Plotly JSON (with typed arrays, see figure_encoding.py)
+# under a key derived from the hashes of the sources it was built from, so a
+# warm start reads the JSON back instead of rebuilding it. Cached figures are
+# also served over HTTP from /figures/<name>.json with an ETag, so the layout
+# only carries a URL.
+import contextlib
+import glob
+import hashlib
+import importlib
+import os
+import threading
+
+from flask import Response, abort, request
+
+from data_registry import source_hash
+from figure_encoding import encoded_json
+from startup_profile import profiled
+
+CACHE_DIR = 'figure_cache'
+
+# figure name -> section module exposing figure_json() -> (key, json text)
+FIGURE_MODULES = {
+    'forecast': 'sections.forecast_layout',
+}
+
+
+def figure_key(sources, version=1, state=()):
+    """Cache key from the content hashes of the given data_registry sources.
+
+    ``state`` lists anything else the figure depends on (e.g. ingested rows).
+    """
+    digest = hashlib.sha256(f'v{version}'.encode())
+    for name in sources:
+        digest.update(source_hash(name).encode())
+    for value in state:
+        digest.update(f'|{value}'.encode())
+    return digest.hexdigest()[:20]
+
+
+@profiled('figure')
+def cached_figure_json(name, key, build):
+    """Return the cached JSON for (name, key), building and storing it on a miss."""
+    path = os.path.join(CACHE_DIR, f'{name}-{key}.json')
+    with contextlib.suppress(FileNotFoundError):
+        with open(path, encoding='utf-8') as f:
+            return f.read()
+
+    text = encoded_json(build())
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    # Drop figures built from older data; another worker may be doing the same
+    for stale in glob.glob(os.path.join(CACHE_DIR, f'{name}-*.json')):
+        if stale != path:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(stale)
+    tmp_path = f'{path}.{os.getpid()}-{threading.get_ident()}.tmp'  # unique per worker thread
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+    return text
+
+
+def figure_url(name, key):
+    return f'/figures/{name}.json?v={key}'
+
+
+def register_routes(server):
+    @server.route('/figures/<name>.json')
+    def serve_figure(name):
+        if name not in FIGURE_MODULES:
+            abort(404)
+        key, text = importlib.import_module(FIGURE_MODULES[name]).figure_json()
+
+        response = Response(text, mimetype='application/json')
+        response.set_etag(key)
+        response.cache_control.public = True
+        if request.args.get('v') == key:
+            # Versioned URL: the content can never change
+            response.cache_control.max_age = 31536000
+            response.cache_control.immutable = True
+        else:
+            response.cache_control.no_cache = True
+        return response.make_conditional(request)
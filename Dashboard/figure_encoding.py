@@ -0,0 +1,108 @@
+# figure_encoding.py
+# Binary wire format for figures with long traces.
+#
+# encode(fig) returns the figure as a Plotly JSON dict in which every numeric
+# trace array of MIN_LENGTH or more values is replaced by a plotly.js
+# typed-array spec {'dtype', 'bdata' (base64, little-endian), 'shape'}.
+# plotly.js decodes these natively (2.28+; Dash serves 2.35 from the plotly
+# package). Integral values, such as counts and cumulative sums held in float
+# columns, use the smallest integer dtype that holds them exactly; other
+# values stay float64.
+#
+# Date arrays become epoch milliseconds, and their axis is marked as a date
+# axis. plotly.js typed arrays have no 64-bit integers, so the milliseconds
+# travel as float64, which is exact well past year 200,000. Evenly spaced
+# dates, such as daily series, shrink to a start and a step (x0/dx).
+#
+# String arrays (labels, hover text, locations) and GeoJSON geometry are not
+# typed-array attributes in plotly.js and are left as JSON.
+import base64
+
+import numpy as np
+import pandas as pd
+from plotly.basedatatypes import BaseFigure
+from plotly.io.json import to_json_plotly
+
+MIN_LENGTH = 32
+SKIP_KEYS = {'geojson'}
+INT_DTYPES = ('u1', 'i1', 'u2', 'i2', 'u4', 'i4')  # plotly.js typed arrays; no 64-bit ints
+
+
+def _int_dtype(values):
+    lo, hi = values.min(), values.max()
+    for code in INT_DTYPES:
+        info = np.iinfo(code)
+        if info.min <= lo and hi <= info.max:
+            return code
+    return None
+
+
+def typed_array(values):
+    """plotly.js typed-array spec for a 1-D or 2-D numeric array, or None if it is not numeric."""
+    a = np.asarray(values)
+    if a.dtype.kind not in 'biuf' or not a.size or a.ndim > 2:
+        return None
+    code = 'f8'
+    if a.dtype.kind == 'b':
+        code = 'u1'
+    elif a.dtype.kind in 'iu' or (np.isfinite(a).all() and np.array_equal(a, np.round(a))):
+        code = _int_dtype(a) or 'f8'
+    spec = {'dtype': code, 'bdata': base64.b64encode(a.astype('<' + code).tobytes()).decode('ascii')}
+    if a.ndim == 2:
+        spec['shape'] = f'{a.shape[0]}, {a.shape[1]}'
+    return spec
+
+
+def _dates(values):
+    # datetime64 array for date-like arrays (numpy or pandas Timestamps), else None
+    a = np.asarray(values)
+    if a.dtype.kind == 'M':
+        return a
+    if a.dtype == object and pd.api.types.infer_dtype(a, skipna=False) in ('datetime64', 'datetime', 'date'):
+        return pd.to_datetime(a).to_numpy()
+    return None
+
+
+def _encode_trace(trace, layout):
+    trace = dict(trace)
+    for key, value in list(trace.items()):
+        if key in SKIP_KEYS:
+            continue
+        if isinstance(value, dict):
+            trace[key] = _encode_trace(value, layout)
+            continue
+        if not isinstance(value, (list, tuple, np.ndarray)) or len(value) < MIN_LENGTH:
+            continue
+        dates = _dates(value) if key in ('x', 'y') else None
+        if dates is not None:
+            if np.isnat(dates).any():
+                continue
+            # Cartesian axis of this trace: 'x2' -> 'xaxis2'
+            axis = key + 'axis' + trace.get(key + 'axis', key)[1:]
+            layout[axis] = dict(layout.get(axis, {}), type='date')
+            ms = dates.astype('datetime64[ms]').astype('int64')
+            steps = np.diff(ms)
+            if (steps == steps[0]).all() and steps[0] > 0:
+                del trace[key]
+                trace[key + '0'] = np.datetime_as_string(dates[0], unit='s')
+                trace['d' + key] = int(steps[0])
+            else:
+                trace[key] = typed_array(ms.astype('float64'))
+            continue
+        spec = typed_array(value)
+        if spec is not None:
+            trace[key] = spec
+    return trace
+
+
+def encode(fig):
+    """Plotly JSON dict of ``fig`` (a figure or its dict) with binary-encoded trace arrays."""
+    if isinstance(fig, BaseFigure):
+        fig = fig.to_plotly_json()
+    layout = dict(fig.get('layout', {}))
+    data = [_encode_trace(trace, layout) for trace in fig.get('data', [])]
+    return dict(fig, data=data, layout=layout)
+
+
+def encoded_json(fig):
+    return to_json_plotly(encode(fig))
@@ -0,0 +1,277 @@
+# forecast_service.py
+# Cached ARIMA fits for the Loss Forecasting tab.
+#
+# A fitted results object holds everything needed to forecast any number of
+# steps ahead, so fits are stored on disk (pickled statsmodels results) and
+# horizons are answered from the cached fit without refitting. Entries are
+# keyed by the series' content hash, the model spec and the training end date.
+# The disk cache is LRU-evicted by access time (mtime is bumped on every hit),
+# and the most recent fits are also kept in memory.
+#
+# Between refits, new observations are absorbed in streaming mode: a
+# StreamingForecaster runs the Kalman filter over just the new days, starting
+# from the last filtered state (results.extend), with the parameters held fixed.
+# That costs the same for every new day regardless of how long the history is.
+# Parameters are re-estimated on the full history only every `refit_every`
+# observations, or earlier when a CUSUM on the standardized one-step forecast
+# errors signals drift.
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from data_registry import source_hash
+
+CACHE_DIR = 'forecast_cache'
+DEFAULT_ORDER = (2, 1, 2)
+SIDES = ('Russia', 'Ukraine')
+# statsmodels results are not safe to forecast from on several threads at once
+_forecast_lock = threading.Lock()
+STREAM_PREFIX = 'stream-'
+
+
+def _fit_arima(series, order, **fit_kwargs):
+    import warnings
+    from statsmodels.tsa.arima.model import ARIMA
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        return ARIMA(series, order=order).fit(**fit_kwargs)
+
+
+def series_key(series, order):
+    digest = hashlib.sha256(series.to_numpy(dtype='float64').tobytes())
+    end = series.index[-1].strftime('%Y%m%d')
+    spec = 'arima-' + '-'.join(str(o) for o in order)
+    return f'{spec}_{end}_{digest.hexdigest()[:16]}'
+
+
+class ForecastService:
+    def __init__(self, cache_dir=CACHE_DIR, max_entries=16, memory_entries=4):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()  # server workers run callbacks on several threads
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + '.pickle')
+
+    def _remember(self, key, results):
+        with self._lock:
+            self._memory[key] = results
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _evict(self):
+        # Fitted results only: stream-<side>.pickle is the streaming state, not a cache entry
+        paths = [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir)
+                 if name.endswith('.pickle') and not name.startswith(STREAM_PREFIX)]
+        paths.sort(key=os.path.getmtime, reverse=True)
+        for path in paths[self.max_entries:]:
+            os.remove(path)
+
+    def fitted(self, series, order=DEFAULT_ORDER):
+        """Fitted ARIMA results for ``series``: memory, then disk, then a fresh fit."""
+        key = series_key(series, order)
+        with self._lock:
+            results = self._memory.get(key)
+            if results is not None:
+                self._memory.move_to_end(key)
+                return results
+
+        path = self._path(key)
+        if os.path.exists(path):
+            os.utime(path)  # mark as recently used
+            with open(path, 'rb') as f:
+                results = pickle.load(f)
+        else:
+            results = _fit_arima(series, order)
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(results, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+            self._evict()
+
+        self._remember(key, results)
+        return results
+
+    def forecast(self, series, horizon, order=DEFAULT_ORDER):
+        """``horizon`` daily values after the end of ``series``, from the cached fit."""
+        results = self.fitted(series, order)
+        with _forecast_lock:
+            values = results.forecast(steps=horizon)
+        dates = pd.date_range(series.index[-1] + pd.Timedelta(days=1), periods=horizon)
+        return pd.Series(values.to_numpy(), index=dates)
+
+
+service = ForecastService()
+
+
+# --- Streaming mode ---
+
+class StreamingForecaster:
+    """ARIMA forecaster that absorbs new daily observations without refitting.
+
+    ``update`` filters only the new values (O(new days)); parameters are
+    re-estimated from ``history()`` every ``refit_every`` observations, or
+    when the two-sided CUSUM of standardized forecast errors exceeds
+    ``cusum_h`` (with allowance ``cusum_k``, both in standard deviations).
+    """
+
+    def __init__(self, results, last_date, last_value, order=DEFAULT_ORDER,
+                 refit_every=30, cusum_k=0.5, cusum_h=5.0, base_sha256=None):
+        self.results = results
+        self.last_date = last_date
+        self.last_value = last_value
+        self.order = order
+        self.refit_every = refit_every
+        self.cusum_k = cusum_k
+        self.cusum_h = cusum_h
+        self.base_sha256 = base_sha256
+        self.since_refit = 0
+        self.cusum = [0.0, 0.0]  # upper, lower
+
+    @classmethod
+    def from_series(cls, series, order=DEFAULT_ORDER, **kwargs):
+        """Start streaming from the (cached) full fit of ``series``."""
+        return cls(service.fitted(series, order), series.index[-1], float(series.iloc[-1]),
+                   order=order, **kwargs)
+
+    def _drifted(self, errors):
+        upper, lower = self.cusum
+        drifted = False
+        for z in errors:
+            upper = max(0.0, upper + z - self.cusum_k)
+            lower = max(0.0, lower - z - self.cusum_k)
+            drifted = drifted or max(upper, lower) > self.cusum_h
+        self.cusum = [upper, lower]
+        return drifted
+
+    def update(self, new_values, history=None):
+        """Absorb daily values dated after ``last_date``.
+
+        ``new_values`` is a Series with a DatetimeIndex; gaps are forward
+        filled. ``history`` is a callable returning the full series, called only
+        when a refit is due. Returns the refit reason ('schedule' / 'drift'),
+        or None when the update was filter-only.
+        """
+        new_values = new_values[new_values.index > self.last_date]
+        if new_values.empty:
+            return None
+        index = pd.date_range(self.last_date + pd.Timedelta(days=1), new_values.index[-1], freq='D')
+        values = new_values.reindex(index).ffill().fillna(self.last_value).astype('float64')
+
+        self.results = self.results.extend(values)
+        errors = self.results.forecasts_error[0] / np.sqrt(self.results.forecasts_error_cov[0, 0])
+        self.last_date = index[-1]
+        self.last_value = float(values.iloc[-1])
+        self.since_refit += len(values)
+
+        reason = 'drift' if self._drifted(errors) else None
+        if reason is None and self.since_refit >= self.refit_every:
+            reason = 'schedule'
+        if reason and history is not None:
+            self.refit(history())
+            return reason
+        return None
+
+    def refit(self, series):
+        """Re-estimate the parameters on ``series``, warm-started from the current ones."""
+        self.results = _fit_arima(series, self.order, start_params=self.results.params)
+        self.last_date = series.index[-1]
+        self.last_value = float(series.iloc[-1])
+        self.since_refit = 0
+        self.cusum = [0.0, 0.0]
+
+    def forecast(self, horizon):
+        with _forecast_lock:
+            values = self.results.forecast(steps=horizon)
+        dates = pd.date_range(self.last_date + pd.Timedelta(days=1), periods=horizon)
+        return pd.Series(np.asarray(values), index=dates)
+
+
+def _stream_path(side, cache_dir=CACHE_DIR):
+    return os.path.join(cache_dir, f'{STREAM_PREFIX}{side}.pickle')
+
+
+_streams = {}  # path -> (mtime_ns, forecaster or None), so horizon changes do not unpickle
+
+
+def load_stream(side, cache_dir=CACHE_DIR):
+    """The saved forecaster for ``side``, or None if missing or built on another base CSV.
+
+    Kept in memory and reloaded only when the file changes (a new ingest).
+    """
+    path = _stream_path(side, cache_dir)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    cached = _streams.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    with open(path, 'rb') as f:
+        stream = pickle.load(f)
+    if stream.base_sha256 != source_hash('equipment'):
+        stream = None
+    _streams[path] = (mtime, stream)
+    return stream
+
+
+def save_stream(side, stream, cache_dir=CACHE_DIR):
+    os.makedirs(cache_dir, exist_ok=True)
+    path = _stream_path(side, cache_dir)
+    with open(path + '.tmp', 'wb') as f:
+        pickle.dump(stream, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(path + '.tmp', path)
+    _streams[path] = (os.stat(path).st_mtime_ns, stream)
+
+
+def series_totals(side):
+    """Daily ``<side>_Total`` including ingested batches (see equipment_series).
+
+    The index is regular (daily), as the fits expect.
+    """
+    from equipment_series import load_series
+    df = load_series().frame.set_index('Date')
+    return df[f'{side}_Total'].asfreq('D').ffill().astype('float64')
+
+
+@lru_cache(maxsize=None)
+def equipment_totals(side):
+    """series_totals(side), computed once per process for the dashboard."""
+    return series_totals(side)
+
+
+def absorb(new_rows, cache_dir=CACHE_DIR):
+    """Stream newly ingested rows into both sides' forecasters.
+
+    Call after ``equipment_series.ingest``. Returns {side: refit reason or None}.
+    """
+    new = new_rows.set_index(pd.to_datetime(new_rows['Date'])).sort_index()
+    reasons = {}
+    for side in SIDES:
+        stream = load_stream(side, cache_dir)
+        if stream is None:
+            # First run for this base CSV: seed from the full series, which
+            # already contains the new rows
+            stream = StreamingForecaster.from_series(series_totals(side),
+                                                     base_sha256=source_hash('equipment'))
+        reasons[side] = stream.update(new[f'{side}_Total'], history=lambda: series_totals(side))
+        save_stream(side, stream, cache_dir)
+    return reasons
+
+
+def forecast_side(side, horizon):
+    """Forecast from the streaming state when there is one, else from the cached full fit."""
+    stream = load_stream(side)
+    if stream is not None:
+        return stream.forecast(horizon)
+    return service.forecast(equipment_totals(side), horizon)
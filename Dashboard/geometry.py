@@ -0,0 +1,342 @@
+# geometry.py
+# Multi-resolution oblast geometry for the civilian losses map.
+#
+# The raw OSM export is ~800 KB of 17-digit coordinates plus dozens of unused
+# name:xx properties. This builds simplified copies at several tolerances:
+#   - rings are cut into arcs at junctions (points where the set of oblasts
+#     sharing a vertex changes), and every arc is simplified once with
+#     Douglas-Peucker, so neighbouring oblasts keep an identical border
+#     (no slivers or gaps between them);
+#   - coordinates are quantized to a fixed number of decimals per level;
+#   - only the properties the map uses are kept.
+#
+# Levels are written next to the source as ukraine_oblasts.<level>.geojson and
+# rebuilt when the source hash changes. Label positions and the name mapping
+# for the casualty data live in a small sidecar index keyed the same way.
+# Run `python geometry.py` to prebuild everything.
+import json
+import os
+from functools import lru_cache
+
+import numpy as np
+
+from data_registry import file_hash
+from startup_profile import profiled
+
+GEOJSON_PATH = '../Rus-Ukr-Civilians/ukraine_oblasts.geojson'
+KEEP_PROPERTIES = ('name:en',)
+
+# level -> (Douglas-Peucker tolerance in degrees, coordinate decimals)
+LEVELS = {
+    'low': (0.01, 3),
+    'medium': (0.003, 3),
+    'high': (0.0008, 4),
+}
+
+# (minimum map zoom, level), checked from the most detailed down
+ZOOM_LEVELS = [(8, 'high'), (6.5, 'medium'), (0, 'low')]
+
+
+def level_for_zoom(zoom):
+    for min_zoom, level in ZOOM_LEVELS:
+        if zoom >= min_zoom:
+            return level
+    return ZOOM_LEVELS[-1][1]
+
+
+def _simplify_arc(points, tolerance):
+    """Douglas-Peucker on an open polyline, returning a boolean keep-mask."""
+    n = len(points)
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        seg = points[end] - points[start]
+        rel = points[start + 1:end] - points[start]
+        seg_len = np.hypot(seg[0], seg[1])
+        if seg_len == 0:
+            dist = np.hypot(rel[:, 0], rel[:, 1])
+        else:
+            dist = np.abs(seg[0] * rel[:, 1] - seg[1] * rel[:, 0]) / seg_len
+        i = int(np.argmax(dist))
+        if dist[i] > tolerance:
+            split = start + 1 + i
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    return keep
+
+
+def _rings(geometry):
+    if geometry['type'] == 'Polygon':
+        return [geometry['coordinates']]
+    if geometry['type'] == 'MultiPolygon':
+        return geometry['coordinates']
+    raise ValueError(f"Unsupported geometry type: {geometry['type']}")
+
+
+def _junctions(ring, owners):
+    """Indices in a closed ring where the set of oblasts sharing the vertex changes."""
+    keys = [tuple(p) for p in ring[:-1]]
+    n = len(keys)
+    fixed = []
+    for i, key in enumerate(keys):
+        here = owners[key]
+        if here != owners[keys[i - 1]] or here != owners[keys[(i + 1) % n]]:
+            fixed.append(i)
+    if not fixed:
+        # Coastline or island: anchor on the start and the farthest vertex
+        pts = np.asarray(ring[:-1])
+        far = int(np.argmax(np.hypot(*(pts - pts[0]).T)))
+        fixed = sorted({0, far})
+    return fixed
+
+
+def simplify_collection(geojson, tolerance, decimals):
+    features = geojson['features']
+
+    # Which features own each vertex
+    owners = {}
+    for idx, feature in enumerate(features):
+        for polygon in _rings(feature['geometry']):
+            for ring in polygon:
+                for p in ring:
+                    owners.setdefault(tuple(p), set()).add(idx)
+    owners = {k: frozenset(v) for k, v in owners.items()}
+
+    arc_cache = {}
+
+    def simplify_arc(arc):
+        # Simplify in a canonical direction so both neighbours get the same arc
+        forward = arc[0] <= arc[-1]
+        key = tuple(arc) if forward else tuple(reversed(arc))
+        if key not in arc_cache:
+            pts = np.asarray(key, dtype=float)
+            arc_cache[key] = pts[_simplify_arc(pts, tolerance)]
+        pts = arc_cache[key]
+        return pts if forward else pts[::-1]
+
+    out_features = []
+    for feature in features:
+        polygons = []
+        for polygon in _rings(feature['geometry']):
+            rings = []
+            for ring in polygon:
+                ring = [tuple(p) for p in ring]
+                fixed = _junctions(ring, owners)
+                n = len(ring) - 1
+                parts = []
+                for a, b in zip(fixed, fixed[1:] + [fixed[0] + n]):
+                    arc = [ring[i % n] for i in range(a, b + 1)]
+                    parts.append(simplify_arc(arc)[:-1])
+                simplified = np.round(np.vstack(parts), decimals)
+                # Drop consecutive duplicates introduced by quantization
+                step = np.any(np.diff(simplified, axis=0) != 0, axis=1)
+                simplified = simplified[np.concatenate([[True], step])]
+                if len(simplified) < 3:
+                    continue
+                rings.append(np.vstack([simplified, simplified[:1]]).tolist())
+            if rings:
+                polygons.append(rings)
+        if not polygons:
+            # Never lose a whole oblast; fall back to its largest ring unsimplified
+            largest = max((r for p in _rings(feature['geometry']) for r in p), key=len)
+            polygons = [[np.round(np.asarray(largest), decimals).tolist()]]
+
+        geometry = ({'type': 'Polygon', 'coordinates': polygons[0]} if len(polygons) == 1
+                    else {'type': 'MultiPolygon', 'coordinates': polygons})
+        properties = {k: feature['properties'][k] for k in KEEP_PROPERTIES if k in feature['properties']}
+        out_features.append({'type': 'Feature', 'properties': properties, 'geometry': geometry})
+
+    return {'type': 'FeatureCollection', 'features': out_features}
+
+
+def _level_path(level):
+    stem, ext = os.path.splitext(GEOJSON_PATH)
+    return f'{stem}.{level}{ext}'
+
+
+def build_levels(force=False):
+    """Write every simplified level that is missing or built from an older source."""
+    source_sha = file_hash(GEOJSON_PATH)
+    geojson = None
+    for level, (tolerance, decimals) in LEVELS.items():
+        path = _level_path(level)
+        if not force and os.path.exists(path):
+            with open(path) as f:
+                if json.load(f).get('source_sha256') == source_sha:
+                    continue
+        if geojson is None:
+            with open(GEOJSON_PATH) as f:
+                geojson = json.load(f)
+        simplified = simplify_collection(geojson, tolerance, decimals)
+        simplified['source_sha256'] = source_sha
+        with open(path, 'w') as f:
+            json.dump(simplified, f, separators=(',', ':'))
+
+
+@lru_cache(maxsize=None)
+@profiled('data')
+def load_level(level):
+    """Simplified oblast FeatureCollection for one of LEVELS."""
+    path = _level_path(level)
+    if not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(GEOJSON_PATH):
+        build_levels()
+    with open(path) as f:
+        return json.load(f)
+
+
+# --- Label positions ---
+
+LABEL_INDEX_PATH = os.path.splitext(GEOJSON_PATH)[0] + '.labels.json'
+
+# Spellings used by the casualty data -> the GeoJSON's name:en (normalized)
+NAME_ALIASES = {
+    'kyiv oblast': 'kiev oblast',
+    'kyiv (city)': 'kiev oblast',  # Map to same coords as oblast
+    'odesa oblast': 'odessa oblast',
+    'zaporizhzhia oblast': 'zaporizhia oblast'
+}
+
+
+def normalize_name(name):
+    return name.strip().lower()
+
+
+def _flatten_rings(features):
+    """All ring vertices as one array, with per-vertex ring and feature ids."""
+    coords, ring_ids, feature_ids = [], [], []
+    ring_id = 0
+    for idx, feature in enumerate(features):
+        for polygon in _rings(feature['geometry']):
+            for ring in polygon:
+                coords.append(np.asarray(ring, dtype=float))
+                ring_ids.append(np.full(len(ring), ring_id))
+                feature_ids.append(np.full(len(ring), idx))
+                ring_id += 1
+    return np.vstack(coords), np.concatenate(ring_ids), np.concatenate(feature_ids)
+
+
+def _centroids(coords, ring_ids, feature_ids, n_features):
+    """Area-weighted centroids over every ring of every feature.
+
+    Signed shoelace areas are summed per feature, so holes (opposite winding)
+    subtract and extra same-winding rings (islands) add.
+    """
+    # Edges run from each vertex to the next one in the same ring
+    same_ring = ring_ids[:-1] == ring_ids[1:]
+    x0, y0 = coords[:-1][same_ring].T
+    x1, y1 = coords[1:][same_ring].T
+    owner = feature_ids[:-1][same_ring]
+    cross = x0 * y1 - x1 * y0
+    area = np.bincount(owner, cross, n_features) / 2
+    cx = np.bincount(owner, (x0 + x1) * cross, n_features) / (6 * area)
+    cy = np.bincount(owner, (y0 + y1) * cross, n_features) / (6 * area)
+    return cx, cy
+
+
+def _edges(feature):
+    rings = [np.asarray(r, dtype=float) for p in _rings(feature['geometry']) for r in p]
+    starts = np.vstack([r[:-1] for r in rings])
+    ends = np.vstack([r[1:] for r in rings])
+    return starts, ends
+
+
+def _inside(points, starts, ends):
+    """Even-odd point-in-polygon test for many points against all edges."""
+    px, py = points[:, :1], points[:, 1:]
+    (x0, y0), (x1, y1) = starts.T, ends.T
+    crosses = (y0 > py) != (y1 > py)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x_at = (x1 - x0) * (py - y0) / (y1 - y0) + x0
+    return np.count_nonzero(crosses & (px < x_at), axis=1) % 2 == 1
+
+
+def _edge_distance(points, starts, ends, x_scale):
+    """Distance from each point to the nearest edge, with longitudes scaled by cos(lat)."""
+    scale = np.array([x_scale, 1.0])
+    p = points[:, None, :] * scale
+    a, b = starts * scale, ends * scale
+    ab = b - a
+    denom = np.maximum((ab ** 2).sum(axis=1), 1e-18)
+    t = np.clip(((p - a) * ab).sum(axis=2) / denom, 0, 1)
+    nearest = a + t[..., None] * ab
+    return np.sqrt(((p - nearest) ** 2).sum(axis=2)).min(axis=1)
+
+
+def _pole_of_inaccessibility(feature, grid=40, rounds=4):
+    """Interior point farthest from the boundary, by iterative grid refinement."""
+    starts, ends = _edges(feature)
+    x_scale = np.cos(np.radians(starts[:, 1].mean()))
+    lo, hi = starts.min(axis=0), starts.max(axis=0)
+    best, best_dist = None, -1.0
+    for _ in range(rounds):
+        gx, gy = np.meshgrid(np.linspace(lo[0], hi[0], grid), np.linspace(lo[1], hi[1], grid))
+        candidates = np.column_stack([gx.ravel(), gy.ravel()])
+        candidates = candidates[_inside(candidates, starts, ends)]
+        if len(candidates):
+            dist = _edge_distance(candidates, starts, ends, x_scale)
+            i = int(np.argmax(dist))
+            if dist[i] > best_dist:
+                best, best_dist = candidates[i], dist[i]
+        if best is None:
+            break
+        # Zoom in on the best cell found so far
+        half = (hi - lo) / grid * 2
+        lo, hi = best - half, best + half
+    return best
+
+
+def build_label_index(geojson, source_sha):
+    features = geojson['features']
+    coords, ring_ids, feature_ids = _flatten_rings(features)
+    cx, cy = _centroids(coords, ring_ids, feature_ids, len(features))
+
+    labels = []
+    for idx, feature in enumerate(features):
+        point = np.array([cx[idx], cy[idx]])
+        starts, ends = _edges(feature)
+        if not _inside(point[None, :], starts, ends)[0]:
+            # Concave oblast (e.g. Odesa): the centroid lies outside it
+            pole = _pole_of_inaccessibility(feature)
+            if pole is not None:
+                point = pole
+        labels.append({'name': feature['properties']['name:en'],
+                       'lon': round(float(point[0]), 5),
+                       'lat': round(float(point[1]), 5)})
+
+    names = {normalize_name(label['name']): normalize_name(label['name']) for label in labels}
+    names.update(NAME_ALIASES)
+    return {'source_sha256': source_sha, 'aliases': NAME_ALIASES,
+            'name_mapping': names, 'labels': labels}
+
+
+@lru_cache(maxsize=None)
+@profiled('data')
+def load_label_index():
+    """Label positions and name mapping, from the sidecar index next to the GeoJSON."""
+    source_sha = file_hash(GEOJSON_PATH)
+    if os.path.exists(LABEL_INDEX_PATH):
+        with open(LABEL_INDEX_PATH) as f:
+            index = json.load(f)
+        if index.get('source_sha256') == source_sha and index.get('aliases') == NAME_ALIASES:
+            return index
+
+    with open(GEOJSON_PATH) as f:
+        index = build_label_index(json.load(f), source_sha)
+    with open(LABEL_INDEX_PATH, 'w') as f:
+        json.dump(index, f, indent=1)
+    return index
+
+
+if __name__ == '__main__':
+    build_levels(force=True)
+    for level in LEVELS:
+        print(level, os.path.getsize(_level_path(level)), 'bytes')
+    load_label_index.cache_clear()
+    if os.path.exists(LABEL_INDEX_PATH):
+        os.remove(LABEL_INDEX_PATH)
+    print(len(load_label_index()['labels']), 'label positions')
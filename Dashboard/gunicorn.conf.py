@@ -0,0 +1,28 @@
+# gunicorn.conf.py
+# Serving the dashboard with gunicorn:
+#
+#   cd Dashboard && gunicorn -c gunicorn.conf.py "wsgi:create_app()"
+#
+# Environment overrides:
+#   DASHBOARD_BIND       address to listen on (default 0.0.0.0:8050)
+#   DASHBOARD_WORKERS    worker processes (default: number of CPUs)
+#   DASHBOARD_THREADS    threads per worker (default 4)
+#   DASHBOARD_TIMEOUT    seconds before a silent worker is restarted (default 60)
+#   DASHBOARD_SHARED_DIR where startup-derived frames are shared (default /dev/shm)
+#
+# Each worker has its own in-memory callback cache and /metrics counters. Set
+# DASHBOARD_CACHE=filesystem or redis (see callback_cache.py) to share cached
+# figures between workers.
+import multiprocessing
+import os
+
+bind = os.environ.get('DASHBOARD_BIND', '0.0.0.0:8050')
+workers = int(os.environ.get('DASHBOARD_WORKERS', multiprocessing.cpu_count()))
+threads = int(os.environ.get('DASHBOARD_THREADS', 4))
+worker_class = 'gthread'
+timeout = int(os.environ.get('DASHBOARD_TIMEOUT', 60))
+
+# Load data and figures once in the master, then fork (see wsgi.py)
+preload_app = True
+# Data paths are relative to the Dashboard directory
+chdir = os.path.dirname(os.path.abspath(__file__))
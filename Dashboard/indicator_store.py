@@ -0,0 +1,179 @@
+# indicator_store.py
+# World Bank (WDI) indicators for any number of countries, memory-mapped.
+#
+# Every WDI export in the economy folder is ingested once: per-country API
+# downloads (4-line preamble) or the bulk WDIData.csv with ~200 countries and
+# regions. The values go into one dense float64 .npy cube of shape
+# (indicator, country, year). Each indicator is a contiguous block, and each
+# (indicator, country) pair is a contiguous row of years. index.json maps codes
+# to positions.
+#
+# Processes open the cube with np.load(mmap_mode='r'), so nothing is read into
+# RAM up front. A lookup of k countries touches only those k rows. Exports are
+# streamed in chunks, so building the cube does not need the full export in
+# memory. The store is rebuilt when the set of exports or their contents change.
+#
+# Build ahead of time with `python indicator_store.py`.
+import glob
+import json
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from data_registry import file_hash
+from startup_profile import profiled
+
+SOURCE_PATTERN = '../Rus-Ukr-Economy/*.csv'
+STORE_DIR = '../Rus-Ukr-Economy/indicator_store'
+CHUNK_ROWS = 50_000
+
+
+def _skiprows(path):
+    # API downloads start with "Data Source" / "Last Updated Date" lines
+    with open(path, encoding='utf-8-sig') as f:
+        return 4 if f.readline().startswith('"Data Source"') else 0
+
+
+def _read(path, **kwargs):
+    return pd.read_csv(path, skiprows=_skiprows(path), encoding='utf-8-sig', **kwargs)
+
+
+def _stamp(path, known=None):
+    st = os.stat(path)
+    if known and known['mtime_ns'] == st.st_mtime_ns and known['size'] == st.st_size:
+        return known
+    return {'mtime_ns': st.st_mtime_ns, 'size': st.st_size, 'sha256': file_hash(path)}
+
+
+def _is_current(index, paths):
+    sources = index.get('sources', {})
+    if sorted(sources) != sorted(paths):
+        return False
+    return all(_stamp(p, sources[p])['sha256'] == sources[p]['sha256'] for p in paths)
+
+
+def build_store(force=False, pattern=SOURCE_PATTERN, store_dir=STORE_DIR):
+    """Write the cube and index unless they match the current exports; returns the index."""
+    paths = sorted(glob.glob(pattern))
+    index_path = os.path.join(store_dir, 'index.json')
+    if not force and os.path.exists(index_path):
+        with open(index_path) as f:
+            index = json.load(f)
+        if _is_current(index, paths):
+            return index
+
+    # Pass 1: the codes and years present, from the id columns and header only
+    indicators, countries, years = {}, {}, set()
+    for path in paths:
+        ids = _read(path, usecols=['Country Name', 'Country Code', 'Indicator Name', 'Indicator Code'])
+        indicators.update(zip(ids['Indicator Code'], ids['Indicator Name']))
+        countries.update(zip(ids['Country Code'], ids['Country Name']))
+        years.update(int(c) for c in _read(path, nrows=0).columns if c.isdigit())
+    indicator_codes, country_codes, years = sorted(indicators), sorted(countries), sorted(years)
+    indicator_pos = {code: i for i, code in enumerate(indicator_codes)}
+    country_pos = {code: i for i, code in enumerate(country_codes)}
+
+    # Pass 2: stream the values into the memory-mapped cube
+    os.makedirs(store_dir, exist_ok=True)
+    values_path = os.path.join(store_dir, 'values.npy')
+    tmp_path = values_path + '.tmp.npy'
+    cube = np.lib.format.open_memmap(tmp_path, mode='w+', dtype='float64',
+                                     shape=(len(indicator_codes), len(country_codes), len(years)))
+    cube[:] = np.nan
+    available = set()
+    for path in paths:
+        for chunk in _read(path, chunksize=CHUNK_ROWS):
+            year_cols = [c for c in chunk.columns if c.isdigit()]
+            available.update(chunk.loc[chunk[year_cols].notna().any(axis=1), 'Indicator Code'])
+            i = chunk['Indicator Code'].map(indicator_pos).to_numpy()
+            j = chunk['Country Code'].map(country_pos).to_numpy()
+            k = np.searchsorted(years, [int(c) for c in year_cols])
+            cube[i[:, None], j[:, None], k[None, :]] = chunk[year_cols].to_numpy(dtype='float64')
+    cube.flush()
+    del cube
+    os.replace(tmp_path, values_path)
+
+    index = {
+        'sources': {p: _stamp(p) for p in paths},
+        'years': years,
+        'indicators': [[code, indicators[code]] for code in indicator_codes],
+        'countries': [[code, countries[code]] for code in country_codes],
+        'available': sorted(available),  # indicators with at least one value
+    }
+    with open(index_path + '.tmp', 'w') as f:
+        json.dump(index, f)
+    os.replace(index_path + '.tmp', index_path)
+    return index
+
+
+@lru_cache(maxsize=None)
+@profiled('data')
+def load_index():
+    index = build_store()
+    index['indicator_pos'] = {code: i for i, (code, _) in enumerate(index['indicators'])}
+    index['country_pos'] = {code: i for i, (code, _) in enumerate(index['countries'])}
+    return index
+
+
+@lru_cache(maxsize=None)
+@profiled('data')
+def load_values(store_dir=STORE_DIR):
+    """The (indicator, country, year) cube, memory-mapped read-only."""
+    load_index()  # builds the store if needed
+    return np.load(os.path.join(store_dir, 'values.npy'), mmap_mode='r')
+
+
+def store_version():
+    """Content hash of the ingested exports, for cache keys."""
+    sources = load_index()['sources']
+    return '|'.join(sources[p]['sha256'] for p in sorted(sources))
+
+
+def indicator_options():
+    """Dropdown options for every indicator with data, sorted by name."""
+    available = set(load_index()['available'])
+    return sorted(({'label': name, 'value': code} for code, name in load_index()['indicators']
+                   if code in available),
+                  key=lambda option: option['label'])
+
+
+def country_options():
+    return sorted(({'label': name, 'value': code} for code, name in load_index()['countries']),
+                  key=lambda option: option['label'])
+
+
+def indicator_name(code):
+    index = load_index()
+    return index['indicators'][index['indicator_pos'][code]][1]
+
+
+def country_name(code):
+    index = load_index()
+    return index['countries'][index['country_pos'][code]][1]
+
+
+def lookup_many(code, countries):
+    """(years, array of shape (len(countries), n_years)) for indicator ``code``.
+
+    Reads only the requested countries' rows from the memory map.
+    """
+    index = load_index()
+    if code not in index['indicator_pos']:
+        raise KeyError(f"unknown indicator {code!r}")
+    rows = [index['country_pos'][country] for country in countries]
+    return index['years'], np.asarray(load_values()[index['indicator_pos'][code], rows])
+
+
+def lookup(code, country):
+    """Yearly values of indicator ``code`` for ``country`` (ISO3 code), or None if it has none."""
+    years, values = lookup_many(code, [country])
+    series = pd.Series(values[0], index=pd.Index(years, name='year'), name='value').dropna()
+    return series if len(series) else None
+
+
+if __name__ == '__main__':
+    index = build_store(force=True)
+    shape = load_values().shape
+    print(f"{shape[0]} indicators x {shape[1]} countries x {shape[2]} years in {STORE_DIR}")
@@ -1,24 +1,38 @@
-# === layout.py ===
+import importlib
+from functools import lru_cache
+
 from dash import dcc, html
-from sections.economic import economic_layout
-from sections.financialaid import financial_layout
-from sections.russian_losses import russian_losses_layout
-from sections.equipment_losses import equipment_layout
-from sections.forecast_layout import forecast_layout
-from sections.civilians import civilians_layout
-from sections.ukr_civilian_losses import ukraine_map_layout
+
+# (tab value, label, section module, layout attribute)
+# Section modules are only imported when their tab is first opened.
+TABS = [
+    ('economic', 'Economic Indicators', 'sections.economic', 'economic_layout'),
+    ('financial-aid', 'Financial Aid to Ukraine', 'sections.financialaid', 'financial_layout'),
+    ('russian-losses', 'Russian Losses', 'sections.russian_losses', 'russian_losses_layout'),
+    ('equipment', 'Equipment Losses', 'sections.equipment_losses', 'equipment_layout'),
+    ('forecast', 'Loss Forecasting', 'sections.forecast_layout', 'forecast_layout'),
+    ('civilians', 'Civilian losses', 'sections.civilians', 'civilians_layout'),
+    ('ukraine-map', 'Ukraine Civilian losses', 'sections.ukr_civilian_losses', 'ukraine_map_layout'),
+    # Future tabs go here
+]
+DEFAULT_TAB = TABS[0][0]
+
+
+@lru_cache(maxsize=None)
+def render_tab(tab_value):
+    """Build a tab's content on first selection and reuse it afterwards."""
+    for value, _, module_name, attr in TABS:
+        if value == tab_value:
+            return getattr(importlib.import_module(module_name), attr)
+    return html.Div(f"Unknown tab: {tab_value}")
 
 
 def create_layout(app):
     return html.Div([
-        dcc.Tabs([
-            dcc.Tab(label='Economic Indicators', children=economic_layout),
-            dcc.Tab(label='Financial Aid to Ukraine', children=financial_layout),
-            dcc.Tab(label='Russian Losses', children=russian_losses_layout),
-            dcc.Tab(label='Equipment Losses', children=equipment_layout),
-            dcc.Tab(label='Loss Forecasting', children=[forecast_layout]),
-            dcc.Tab(label='Civilian losses', children=[civilians_layout]),
-            dcc.Tab(label='Ukraine Civilian losses', children=[ukraine_map_layout])
-            # Future tabs go here
-        ])
+        dcc.Tabs(
+            id='main-tabs',
+            value=DEFAULT_TAB,
+            children=[dcc.Tab(label=label, value=value) for value, label, _, _ in TABS]
+        ),
+        dcc.Loading(html.Div(id='tab-content'))
     ])
@@ -0,0 +1,71 @@
+# rollups.py
+# Precomputed weekly / monthly / yearly aggregates of the loss series.
+#
+# Charts with a time-aggregation selector read a level from here instead of
+# resampling on each request. A series' levels are built once per process, on
+# first use, from the shared frames:
+#   - flow columns (losses per row, e.g. Mediazona's weekly counts) are summed
+#     into each period;
+#   - cumulative columns (running totals, e.g. the equipment category counts)
+#     become the losses within each period: the period-end value minus the
+#     previous period's end.
+# A series' native frequency is served as-is rather than re-bucketed.
+from functools import lru_cache
+
+from data_registry import load_dataset
+from startup_profile import profiled
+
+LEVELS = {'W': 'Weekly', 'M': 'Monthly', 'Y': 'Yearly'}
+
+PERSONNEL_COLUMNS = ['total', 'vol', 'mob', 'inmates']
+EQUIPMENT_CATEGORIES = [
+    'Tanks', 'AFV', 'IFV', 'APC', 'IMV', 'Engineering', 'Coms', 'Vehicles',
+    'Aircraft', 'Infantry', 'Logistics', 'Armor', 'Antiair', 'Artillery',
+]
+
+
+def _personnel():
+    return load_dataset('russian_personnel'), 'week_start', PERSONNEL_COLUMNS, [], 'W'
+
+
+def _equipment():
+    from equipment_series import load_series
+    columns = [f'{side}_{c}' for side in ('Russia', 'Ukraine') for c in EQUIPMENT_CATEGORIES + ['Total']]
+    return load_series().frame, 'Date', [], columns, None
+
+
+# name -> () -> (frame, date column, flow columns, cumulative columns, native level)
+SERIES = {
+    'personnel': _personnel,
+    'equipment': _equipment,
+}
+
+
+def rollup(frame, date_col, level, flows=(), cumulative=()):
+    """One aggregation level of ``frame``, indexed by period start ('period' column)."""
+    periods = frame[date_col].dt.to_period(level)
+    grouped = frame.groupby(periods, sort=True)
+    out = grouped[list(flows)].sum()
+    if cumulative:
+        ends = grouped[list(cumulative)].last()
+        out[list(cumulative)] = ends.diff().fillna(ends)
+    out.index = out.index.to_timestamp()
+    return out.rename_axis('period').reset_index()
+
+
+@lru_cache(maxsize=None)
+@profiled('data')
+def levels(name):
+    """{level: frame} for one of the SERIES."""
+    frame, date_col, flows, cumulative, native = SERIES[name]()
+    result = {}
+    for level in LEVELS:
+        if level == native:
+            result[level] = frame[[date_col] + flows + cumulative].rename(columns={date_col: 'period'})
+        else:
+            result[level] = rollup(frame, date_col, level, flows, cumulative)
+    return result
+
+
+def get(name, level):
+    return levels(name)[level]
@@ -1,11 +1,11 @@
 import json
-import pandas as pd
 import plotly.express as px
 from dash import html, dcc
+from data_registry import load_dataset
 
 # Load preprocessed civilian data
-df_ukr = pd.read_csv('../Rus-Ukr-Civilians/ukraine-civilian-preprocessed.csv')
-df_rus = pd.read_csv('../Rus-Ukr-Civilians/russia-civilian-preprocessed.csv')
+df_ukr = load_dataset('ukraine_civilians')
+df_rus = load_dataset('russia_civilians')
 
 
 # Compute average fatalities per day for Ukraine
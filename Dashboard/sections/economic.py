@@ -1,49 +1,42 @@
 from dash import dcc, html
+import numpy as np
 import pandas as pd
+from indicator_store import country_name, country_options, indicator_options, lookup, lookup_many
 
-# Load data
-df_russia = pd.read_csv('../Rus-Ukr-Economy/russia_eco_indicators.csv', skiprows=4)
-df_ukraine = pd.read_csv('../Rus-Ukr-Economy/ukr_eco_indicators.csv', skiprows=4)
+# Indicators and countries come from the WDI store in indicator_store.py
+DEFAULT_COUNTRIES = ['RUS', 'UKR']
+SHORT_NAMES = {'RUS': 'Russia'}  # legend labels where the WDI name is long
+YEARS = range(2014, 2024)
+DEFAULT_INDICATOR = 'NY.GDP.MKTP.CD'  # GDP (current US$)
+GDP_GROWTH = 'NY.GDP.MKTP.KD.ZG'  # GDP growth (annual %)
 
-indicators_to_keep = [
-    'GDP (current US$)',
-    'GDP growth (annual %)',
-    'GDP per capita (current US$)',
-    'Unemployment, total (% of total labor force) (national estimate)',
-    'Inflation, consumer prices (annual %)',
-    'Exports of goods and services (% of GDP)',
-    'Imports of goods and services (% of GDP)',
-    'External balance on goods and services (current US$)'
-]
 
-def prepare_df(df):
-    df = df[df['Indicator Name'].isin(indicators_to_keep)]
-    year_cols = [str(year) for year in range(2014, 2024)]
-    df = df[['Indicator Name'] + year_cols]
-    df = df.set_index('Indicator Name').T.reset_index().rename(columns={'index': 'Year'})
-    df['Year'] = df['Year'].astype(int)
-    for col in indicators_to_keep:
-        df[col] = pd.to_numeric(df[col], errors='coerce')
-    return df
+def indicator_frame(code, countries=DEFAULT_COUNTRIES):
+    """Year / Value / Country rows of one indicator for the selected countries and plotted years."""
+    years, values = lookup_many(code, countries)
+    position = {year: i for i, year in enumerate(years)}
+    missing = [year for year in YEARS if year not in position]
+    if missing:
+        raise KeyError(f"indicator store has no column for years {missing}")
+    columns = [position[year] for year in YEARS]
+    labels = [SHORT_NAMES.get(c) or country_name(c) for c in countries]
+    return pd.DataFrame({
+        'Year': np.tile(YEARS, len(countries)),
+        'Value': values[:, columns].ravel(),
+        'Country': np.repeat(labels, len(YEARS)),
+    })
 
-df_russia = prepare_df(df_russia)
-df_ukraine = prepare_df(df_ukraine)
-
-# Add country label
-df_russia['Country'] = 'Russia'
-df_ukraine['Country'] = 'Ukraine'
-df_all = pd.concat([df_russia, df_ukraine])
-df_all_melted = df_all.melt(id_vars=['Year', 'Country'], var_name='Indicator', value_name='Value')
 
 # === Calculate GDP Growth Percentage Drop for 2022 ===
-def gdp_drop(df, country_name):
-    gdp_2021 = df.loc[df['Year'] == 2021, 'GDP growth (annual %)'].values[0]
-    gdp_2022 = df.loc[df['Year'] == 2022, 'GDP growth (annual %)'].values[0]
+def gdp_drop(country):
+    growth = lookup(GDP_GROWTH, country)
+    gdp_2021 = growth[2021]
+    gdp_2022 = growth[2022]
     drop = ((gdp_2021 - gdp_2022) / abs(gdp_2021)) * 100
     return round(drop, 2)
 
-russia_drop = gdp_drop(df_russia, 'Russia')
-ukraine_drop = gdp_drop(df_ukraine, 'Ukraine')
+russia_drop = gdp_drop('RUS')
+ukraine_drop = gdp_drop('UKR')
 
 economic_layout = html.Div([
     html.H2("Economic Indicators", style={'textAlign': 'center'}),
@@ -51,12 +44,21 @@ economic_layout = html.Div([
     html.Label("Select Economic Indicator:"),
     dcc.Dropdown(
         id='indicator-dropdown',
-        options=[{'label': ind, 'value': ind} for ind in indicators_to_keep],
-        value='GDP (current US$)',
+        options=indicator_options(),
+        value=DEFAULT_INDICATOR,
         clearable=False,
         style={'width': '60%'}
     ),
 
+    html.Label("Countries and regions:"),
+    dcc.Dropdown(
+        id='country-dropdown',
+        options=country_options(),
+        value=DEFAULT_COUNTRIES,
+        multi=True,
+        style={'width': '60%'}
+    ),
+
     html.Br(),
 
     html.Div([
@@ -1,31 +1,157 @@
-import pandas as pd
-from dash import Dash, html, dcc, Input, Output
-import plotly.graph_objs as go
-
-# Load data
-df = pd.read_csv('../Rus-Ukr-Equipment/ukr-rus-equipment_cleaned.csv')
-df['Date'] = pd.to_datetime(df['Date'])
+import base64
 
-# Calculate smoothed ratio column with 7-day rolling average (centered)
-df['Ratio_RU_UA_Smoothed'] = df['Ratio RU/UA'].rolling(window=7, center=True).mean()
+import numpy as np
+from dash import Patch, html, dcc
+import plotly.graph_objs as go
+from downsample import downsampled, zoom_patch
+from equipment_series import load_series
+from figure_encoding import encode
+from startup_profile import profiled
 
-# Calculate daily increases
-df['Russia_Daily_Increase'] = df['Russia_Total'].diff().fillna(0).clip(lower=0)
-df['Ukraine_Daily_Increase'] = df['Ukraine_Total'].diff().fillna(0).clip(lower=0)
+# Load data: base CSV plus any ingested days, with derived columns
+# (smoothed ratio, daily increases, cumulative losses) kept up to date
+# incrementally; see equipment_series.py
+series = load_series()
+df = series.frame
 
 # Sum of daily increases (total losses)
-russia_total_loss = df['Russia_Daily_Increase'].sum()
-ukraine_total_loss = df['Ukraine_Daily_Increase'].sum()
+russia_total_loss = series.total_loss('Russia')
+ukraine_total_loss = series.total_loss('Ukraine')
 
 # Average daily loss
-russia_avg_daily_loss = df['Russia_Daily_Increase'].mean()
-ukraine_avg_daily_loss = df['Ukraine_Daily_Increase'].mean()
+russia_avg_daily_loss = series.avg_daily_loss('Russia')
+ukraine_avg_daily_loss = series.avg_daily_loss('Ukraine')
+
+
+
+# --- Counter data (the slider updates the counters in the browser) ---
+COUNTER_COLUMNS = [
+    'Russia_Tanks', 'Russia_Aircraft', 'Russia_Artillery',
+    'Ukraine_Tanks', 'Ukraine_Aircraft', 'Ukraine_Artillery',
+]
+
+
+def counter_store():
+    """Counter columns as one base64 row-major typed array (int16 when the counts fit)."""
+    values = df[COUNTER_COLUMNS].to_numpy()
+    dtype = 'int16' if values.max() <= np.iinfo('int16').max else 'int32'
+    return {
+        'columns': COUNTER_COLUMNS,
+        'rows': len(values),
+        'dtype': dtype,
+        # Typed arrays in the browser read little-endian
+        'data': base64.b64encode(values.astype(np.dtype(dtype).newbyteorder('<')).tobytes()).decode('ascii'),
+    }
+
+
+# --- Ratio figure (built once; the slider only moves its cursor) ---
+CURSOR_TRACE = 1  # 'Selected date' marker
+CURSOR_SHAPE = 2  # after the 1:1 and average lines
 
 
+@profiled('figure')
+def build_ratio_figure(selected_index=0):
+    # Step 1: Calculate average of the smoothed ratio
+    avg_ratio = df['Ratio_RU_UA_Smoothed'].mean()
+
+    # Step 2: Plot figure
+    fig = go.Figure()
+
+    # Smoothed ratio line (LTTB-downsampled; zooming re-queries the window)
+    ratio_x, ratio_y = downsampled(df['Date'], df['Ratio_RU_UA_Smoothed'])
+    fig.add_trace(go.Scatter(
+        x=ratio_x, 
+        y=ratio_y, 
+        mode='lines', 
+        name='Smoothed Ratio', 
+        line=dict(color='purple')
+    ))
+
+    # Selected date marker
+    fig.add_trace(go.Scatter(
+        x=[df['Date'].iloc[selected_index]],
+        y=[df['Ratio_RU_UA_Smoothed'].iloc[selected_index]],
+        mode='markers',
+        name='Selected Date',
+        marker=dict(color='darkorange', size=10)
+    ))
+
+    # 1:1 Reference line
+    fig.add_hline(
+        y=1, 
+        line_dash='dash', 
+        line_color='black', 
+        annotation_text='1:1 Ratio', 
+        annotation_position='top left'
+    )
+
+    # Average ratio line
+    fig.add_hline(
+        y=avg_ratio,
+        line_dash='dash',
+        line_color='red',
+        annotation_text=f'Avg: {avg_ratio:.2f}',
+        annotation_position='top right'
+    )
+
+    # Cursor for the slider's date
+    fig.add_vline(x=df['Date'].iloc[selected_index], line=dict(color='darkorange', width=1))
+
+    # Layout
+    fig.update_layout(
+        title='Ratio of Russian to Ukrainian Equipment Losses Over Time (Smoothed)',
+        xaxis_title='Date',
+        yaxis_title='Loss Ratio',
+        height=600,
+        template='plotly_white',
+        margin=dict(l=40, r=40, t=60, b=40),
+        uirevision='loss-ratio',  # keep the user's zoom when zoom patches replace the data
+    )
+
+    return fig
+
+
+ratio_figure = build_ratio_figure()
+
+
+# --- Cumulative loss figure (LTTB-downsampled; zooming re-queries the window) ---
+@profiled('figure')
+def build_cumulative_figure():
+    russia_x, russia_y = downsampled(df['Date'], df['Russia_Cumulative_Loss'])
+    ukraine_x, ukraine_y = downsampled(df['Date'], df['Ukraine_Cumulative_Loss'])
+    return go.Figure([
+        go.Scatter(
+            x=russia_x,
+            y=russia_y,
+            name='Russia Cumulative Loss',
+            fill='tozeroy',
+            mode='none',
+            fillcolor='lightcoral'
+        ),
+        go.Scatter(
+            x=ukraine_x,
+            y=ukraine_y,
+            name='Ukraine Cumulative Loss',
+            fill='tozeroy',
+            mode='none',
+            fillcolor='skyblue'
+        )
+    ]).update_layout(
+        xaxis_title='Date',
+        yaxis_title='Cumulative Losses',
+        template='plotly_white',
+        height=500,
+        title='Cumulative Losses Over Time',
+        margin=dict(l=40, r=40, t=60, b=40),
+        uirevision='cumulative-loss',
+    )
+
 
 equipment_layout = html.Div([
     html.H2("Equipment Destroyed Over Time"),
     
+    dcc.Store(id='equipment-counts', data=counter_store()),
+
     dcc.Slider(
         id='date-slider',
         min=0,
@@ -81,7 +207,7 @@ equipment_layout = html.Div([
     
     # Ratio plot
     html.Div([
-        dcc.Graph(id='loss-ratio-graph')
+        dcc.Graph(id='loss-ratio-graph', figure=encode(ratio_figure))
     ], style={'marginTop': '50px'}),
     
     # Cumulative loss chart with total/average stats
@@ -95,34 +221,7 @@ html.Div([
         html.P(f"Ukraine Average Daily Loss: {ukraine_avg_daily_loss:.2f}", style={'color': 'darkblue', 'fontSize': '16px'}),
     ], style={'textAlign': 'center', 'marginBottom': '20px'}),
 
-    dcc.Graph(
-        id='cumulative-loss-graph',
-        figure=go.Figure([
-            go.Scatter(
-                x=df['Date'],
-                y=df['Russia_Daily_Increase'].cumsum(),
-                name='Russia Cumulative Loss',
-                fill='tozeroy',
-                mode='none',
-                fillcolor='lightcoral'
-            ),
-            go.Scatter(
-                x=df['Date'],
-                y=df['Ukraine_Daily_Increase'].cumsum(),
-                name='Ukraine Cumulative Loss',
-                fill='tozeroy',
-                mode='none',
-                fillcolor='skyblue'
-            )
-        ]).update_layout(
-            xaxis_title='Date',
-            yaxis_title='Cumulative Losses',
-            template='plotly_white',
-            height=500,
-            title='Cumulative Losses Over Time',
-            margin=dict(l=40, r=40, t=60, b=40)
-        )
-    )
+    dcc.Graph(id='cumulative-loss-graph', figure=encode(build_cumulative_figure()))
 ], style={'marginTop': '50px'}),
 
 
@@ -148,91 +247,25 @@ html.Div([
 
 ])
 
-def register_callbacks(app):
-    @app.callback(
-        Output('russia-tanks-destroyed', 'children'),
-        Output('russia-aircraft-destroyed', 'children'),
-        Output('russia-artillery-destroyed', 'children'),
-        Output('russia-total-destroyed', 'children'),
-        Output('ukraine-tanks-destroyed', 'children'),
-        Output('ukraine-aircraft-destroyed', 'children'),
-        Output('ukraine-artillery-destroyed', 'children'),
-        Output('ukraine-total-destroyed', 'children'),
-        Input('date-slider', 'value')
-    )
-    def update_destroyed_numbers(selected_index):
-        row = df.iloc[selected_index]
-        
-        # Russia
-        r_tanks = int(row['Russia_Tanks'])
-        r_aircraft = int(row['Russia_Aircraft'])
-        r_artillery = int(row['Russia_Artillery'])
-        r_total = r_tanks + r_aircraft + r_artillery
-        
-        # Ukraine
-        u_tanks = int(row['Ukraine_Tanks'])
-        u_aircraft = int(row['Ukraine_Aircraft'])
-        u_artillery = int(row['Ukraine_Artillery'])
-        u_total = u_tanks + u_aircraft + u_artillery
-        
-        return (
-            f"Tanks Destroyed: {r_tanks}",
-            f"Aircraft Destroyed: {r_aircraft}",
-            f"Artillery Destroyed: {r_artillery}",
-            f"Total Equipment Destroyed: {r_total}",
-            f"Tanks Destroyed: {u_tanks}",
-            f"Aircraft Destroyed: {u_aircraft}",
-            f"Artillery Destroyed: {u_artillery}",
-            f"Total Equipment Destroyed: {u_total}",
-        )
+# --- Callbacks (registered lazily in callbacks.py) ---
+def update_loss_ratio(selected_index):
+    # The ratio figure is static; only the cursor for the selected date moves
+    date = df['Date'].iloc[selected_index].strftime('%Y-%m-%d')
+    patched = Patch()
+    patched['layout']['shapes'][CURSOR_SHAPE]['x0'] = date
+    patched['layout']['shapes'][CURSOR_SHAPE]['x1'] = date
+    patched['data'][CURSOR_TRACE]['x'] = [date]
+    patched['data'][CURSOR_TRACE]['y'] = [df['Ratio_RU_UA_Smoothed'].iloc[selected_index]]
+    return patched
 
-    @app.callback(
-    Output('loss-ratio-graph', 'figure'),
-    Input('date-slider', 'value')  # Input here to trigger update if needed
-    )
-    def update_loss_ratio(_):
-        # Step 1: Calculate average of the smoothed ratio
-        avg_ratio = df['Ratio_RU_UA_Smoothed'].mean()
-
-        # Step 2: Plot figure
-        fig = go.Figure()
-
-        # Smoothed ratio line
-        fig.add_trace(go.Scatter(
-            x=df['Date'], 
-            y=df['Ratio_RU_UA_Smoothed'], 
-            mode='lines', 
-            name='Smoothed Ratio', 
-            line=dict(color='purple')
-        ))
-
-        # 1:1 Reference line
-        fig.add_hline(
-            y=1, 
-            line_dash='dash', 
-            line_color='black', 
-            annotation_text='1:1 Ratio', 
-            annotation_position='top left'
-        )
-
-        # Average ratio line
-        fig.add_hline(
-            y=avg_ratio,
-            line_dash='dash',
-            line_color='red',
-            annotation_text=f'Avg: {avg_ratio:.2f}',
-            annotation_position='top right'
-        )
 
-        # Layout
-        fig.update_layout(
-            title='Ratio of Russian to Ukrainian Equipment Losses Over Time (Smoothed)',
-            xaxis_title='Date',
-            yaxis_title='Loss Ratio',
-            height=600,
-            template='plotly_white',
-            margin=dict(l=40, r=40, t=60, b=40)
-        )
+def zoom_loss_ratio(relayout_data):
+    # Full-resolution smoothed ratio for the visible window
+    return zoom_patch(relayout_data, [(0, df['Date'], df['Ratio_RU_UA_Smoothed'])])
 
-        return fig
 
+def zoom_cumulative_loss(relayout_data):
+    return zoom_patch(relayout_data, [
+        (0, df['Date'], df['Russia_Cumulative_Loss']),
+        (1, df['Date'], df['Ukraine_Cumulative_Loss']),
+    ])
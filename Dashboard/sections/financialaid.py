@@ -1,37 +1,16 @@
 # sections/financial_aid.py
-import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from dash import dcc, html, Input, Output, callback
+from dash import dcc, html
 from plotly.subplots import make_subplots
+from aid_cube import AidCube
+from callback_cache import memoize
+from data_registry import load_dataset
 
-# --- Load and Clean Dataset ---
-df = pd.read_csv('../Financial-aid/financialaid.csv')
-
-money_columns = [
-    'tot_activity_value', 'tot_activity_value_EUR', 'tot_activity_value_constant_currency',
-    'tot_sub_activity_value', 'tot_sub_activity_value_EUR', 'tot_sub_activity_value_constant_currency',
-    'tot_sub_activity_value_constant_currency_redistr', 'tot_sub_activity_value_EUR_redistr',
-    'tot_value_deliv_EUR', 'tot_sub_activity_value_EUR_OLD',
-    'item_price_USD', 'item_value_estimate_USD', 'item_value_estimate_deliv_USD'
-]
-
-for col in money_columns:
-    if col in df.columns:
-        df[col] = df[col].astype(str).str.replace(',', '').str.strip()
-        df[col] = df[col].replace(['.', '', 'nan', 'NaN'], pd.NA)
-        df[col] = pd.to_numeric(df[col], errors='coerce')
-
-df['announcement_date'] = pd.to_datetime(df['announcement_date'], errors='coerce')
-df = df.dropna(subset=['donor', 'tot_activity_value_EUR', 'announcement_date'])
-
-df['aid_type_general'] = df['aid_type_general'].astype(str).str.strip().str.title().replace(['Nan', ''], pd.NA)
-
-df['donor'] = df['donor'].astype('category')
-df['aid_type_general'] = df['aid_type_general'].astype('category')
-df['year_month'] = df['announcement_date'].dt.to_period('M').astype(str)
-df['month'] = df['announcement_date'].dt.month_name()
-df['year'] = df['announcement_date'].dt.year
+# --- Load Dataset ---
+# Money columns, categoricals and dates are typed by the registry's schema.
+# Charts read from the pre-aggregated cube, not the raw rows.
+cube = AidCube(load_dataset('financial_aid'))
 
 # --- 1. Aid by Donor Dropdown UI ---
 aid_by_donor_ui = html.Div([
@@ -50,7 +29,7 @@ aid_by_donor_ui = html.Div([
 ])
 
 # --- 2. Aid Over Time ---
-aid_over_time = df.groupby('year_month')['tot_activity_value_EUR'].sum().reset_index()
+aid_over_time = cube.by_month.reset_index()
 fig2 = px.line(
     aid_over_time,
     x='year_month',
@@ -61,12 +40,7 @@ fig2 = px.line(
 )
 
 # --- 3. Seasonal Trends ---
-monthly_trend = df.groupby('month')['tot_activity_value_EUR'].sum()
-months_order = [
-    'January', 'February', 'March', 'April', 'May', 'June',
-    'July', 'August', 'September', 'October', 'November', 'December'
-]
-monthly_trend = monthly_trend.reindex(months_order)
+monthly_trend = cube.by_calendar_month
 fig3 = px.bar(
     x=monthly_trend.index,
     y=monthly_trend.values,
@@ -83,7 +57,7 @@ battles = {
     '2023-06-04': 'Counteroffensive Begins',
     '2023-12-31': 'Stalemate Period'
 }
-monthly_aid = df.groupby(df['announcement_date'].dt.to_period('M').astype(str))['tot_activity_value_EUR'].sum()
+monthly_aid = cube.by_month
 fig4 = go.Figure()
 fig4.add_trace(go.Scatter(x=monthly_aid.index, y=monthly_aid.values, mode='lines+markers', name='Monthly Aid'))
 
@@ -112,7 +86,7 @@ fig4.update_layout(
     yaxis_title='Total Aid (EUR)'
 )
 
-from dash import dcc, html, Input, Output, callback
+from dash import dcc, html
 import plotly.graph_objects as go
 import plotly.express as px
 
@@ -169,11 +143,8 @@ layout = html.Div([
     dcc.Graph(id='aid-time-graph', figure=fig_plain)
 ])
 
-# Callback for toggling graph
-@callback(
-    Output('aid-time-graph', 'figure'),
-    Input('timeline-toggle', 'value')
-)
+# Callback for toggling graph (registered in callbacks.py)
+@memoize('financial_aid')
 def toggle_timeline(selected_option):
     if selected_option == 'timeline':
         return fig_timeline
@@ -181,10 +152,8 @@ def toggle_timeline(selected_option):
 
 
 # --- 5. Aid Before vs After 2023 ---
-pre = df[df['announcement_date'] < '2023-01-01']
-post = df[df['announcement_date'] >= '2023-01-01']
-pre_aid = pre.groupby('aid_type_general')['tot_activity_value_EUR'].sum()
-post_aid = post.groupby('aid_type_general')['tot_activity_value_EUR'].sum()
+pre_aid = cube.by_type_before('2023-01')
+post_aid = cube.by_type_since('2023-01')
 
 fig5 = make_subplots(rows=1, cols=2, subplot_titles=('Aid Types Before 2023', 'Aid Types Since 2023'))
 fig5.add_trace(go.Bar(x=pre_aid.index, y=pre_aid.values), row=1, col=1)
@@ -192,7 +161,7 @@ fig5.add_trace(go.Bar(x=post_aid.index, y=post_aid.values), row=1, col=2)
 fig5.update_layout(title_text='Aid by Type: Before vs Since 2023', showlegend=False)
 
 # --- 6. Aid Distribution Pie ---
-aid_by_type = df.groupby('aid_type_general')['tot_activity_value_EUR'].sum().dropna().sort_values(ascending=False)
+aid_by_type = cube.by_type.dropna().sort_values(ascending=False)
 top = aid_by_type[:7]
 if len(aid_by_type) > 7:
     top['Other'] = aid_by_type[7:].sum()
@@ -203,9 +172,7 @@ fig6.update_traces(
 )
 
 # --- 7. Top Donor per Aid Type ---
-donor_per_type = df.groupby(['aid_type_general', 'donor'])['tot_activity_value_EUR'].sum().reset_index()
-idx = donor_per_type.groupby('aid_type_general')['tot_activity_value_EUR'].idxmax()
-top_donors = donor_per_type.loc[idx].sort_values('tot_activity_value_EUR')
+top_donors = cube.top_donor_per_type().sort_values('tot_activity_value_EUR')
 fig7 = px.bar(
     top_donors,
     x='tot_activity_value_EUR',
@@ -216,19 +183,14 @@ fig7 = px.bar(
     labels={'tot_activity_value_EUR': 'Total Aid (EUR)', 'aid_type_general': 'Aid Type'}
 )
 
-# --- Callback for Dropdown ---
-@callback(
-    Output('donor-bar-chart', 'figure'),
-    Input('donor-sort-dropdown', 'value')
-)
+# --- Callback for Dropdown (registered in callbacks.py) ---
+@memoize('financial_aid')
 def update_donor_chart(sort_order):
-    aid_sum = df.groupby('donor')['tot_activity_value_EUR'].sum()
-
     if sort_order == 'top':
-        sorted_donors = aid_sum.sort_values(ascending=False).head(10)
+        sorted_donors = cube.top_donors(10)
         title = "Top 10 Donors by Total Aid (EUR)"
     else:
-        sorted_donors = aid_sum.sort_values().head(10)
+        sorted_donors = cube.bottom_donors(10)
         title = "Bottom 10 Donors by Total Aid (EUR)"
 
     fig = px.bar(
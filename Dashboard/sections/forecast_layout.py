@@ -1,88 +1,176 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-import io
-import base64
-from dash import html
-from matplotlib.ticker import FuncFormatter
-
-# Load the original data and forecast data
-df = pd.read_csv('../Rus-Ukr-Equipment/ukr-rus-equipment_cleaned.csv')
-forecast_df = pd.read_csv('../Rus-Ukr-Equipment/forecast.csv')
-
-# Convert dates to datetime
-df['Date'] = pd.to_datetime(df['Date'])
-forecast_df['Date'] = pd.to_datetime(forecast_df['Date'])
-
-# Set index for original data
-df.set_index('Date', inplace=True)
-
-# Formatting function for y-axis
-def thousands_formatter(x, pos):
-    return f'{int(x/1000)}K'
-
-fig, ax1 = plt.subplots(figsize=(14, 8))  # Single plot with adjusted height
-
-# Main plot - Cumulative losses
-ax1.plot(df.index, df['Russia_Total'], label='Russia Actual', color='#E53935', linewidth=2)
-ax1.plot(df.index, df['Ukraine_Total'], label='Ukraine Actual', color='#1E88E5', linewidth=2)
-ax1.plot(forecast_df['Date'], forecast_df['Russia_Forecast'], label='Russia Forecast', color='#B71C1C', linestyle='--')
-ax1.plot(forecast_df['Date'], forecast_df['Ukraine_Forecast'], label='Ukraine Forecast', color='#0D47A1', linestyle='--')
-
-# Formatting
-ax1.set_title('6-Month Forecast of Total Equipment Losses in Russia-Ukraine War', 
-             fontsize=16, pad=20, fontweight='bold')
-ax1.set_xlabel('Date', fontsize=12)
-ax1.set_ylabel('Total Equipment Losses', fontsize=12)
-ax1.legend(loc='upper left', fontsize=10)
-ax1.grid(True, linestyle='--', alpha=0.6)
-ax1.yaxis.set_major_formatter(FuncFormatter(thousands_formatter))
-
-# Add vertical line for forecast start
-last_date = df.index[-1]
-ax1.axvline(x=last_date, color='gray', linestyle=':', linewidth=1.5)
-ax1.text(last_date - pd.Timedelta(days=60), ax1.get_ylim()[1]*0.9, 
-        'Forecast Start', rotation=0, color='gray')
-
-# Add annotation with forecast values
-last_rus = int(forecast_df['Russia_Forecast'].iloc[-1])
-last_ukr = int(forecast_df['Ukraine_Forecast'].iloc[-1])
-ax1.annotate(f'Russia: ~{last_rus:,}', 
-            xy=(forecast_df['Date'].iloc[-1], forecast_df['Russia_Forecast'].iloc[-1]),
-            xytext=(10, 10), textcoords='offset points',
-            bbox=dict(boxstyle='round,pad=0.5', fc='#FFEBEE', ec='#B71C1C'),
-            color='#B71C1C')
-ax1.annotate(f'Ukraine: ~{last_ukr:,}', 
-            xy=(forecast_df['Date'].iloc[-1], forecast_df['Ukraine_Forecast'].iloc[-1]),
-            xytext=(10, -25), textcoords='offset points',
-            bbox=dict(boxstyle='round,pad=0.5', fc='#E3F2FD', ec='#0D47A1'),
-            color='#0D47A1')
-
-plt.tight_layout()
-
-# Convert to base64 image
-buf = io.BytesIO()
-fig.savefig(buf, format='png', dpi=120, bbox_inches='tight')
-buf.seek(0)
-encoded_img = base64.b64encode(buf.read()).decode()
+import json
+
+from dash import Patch, dcc, html
+from downsample import downsampled, zoom_patch
+from equipment_series import load_series
+from figure_cache import cached_figure_json, figure_key, figure_url
+from startup_profile import profiled
+
+# Bump when the figure below changes so stale cache entries are not reused
+FIGURE_VERSION = 6
+FIGURE_SOURCES = ('equipment',)
+DEFAULT_HORIZON = 180
+
+
+def forecast_lines(horizon):
+    """{side: daily forecast} for ``horizon`` days, from the same cached fits at every horizon."""
+    from forecast_service import SIDES, forecast_side
+    return {side: forecast_side(side, horizon) for side in SIDES}
+
+
+def projected_text(adjective, horizon, value):
+    return f"Projected {adjective} losses in {horizon} days: ~{value:,}"
+
+
+def forecast_title(horizon):
+    return f'<b>{horizon}-Day Forecast of Total Equipment Losses in Russia-Ukraine War</b>'
+
+
+@profiled('figure')
+def build_forecast_figure():
+    import pandas as pd
+    import plotly.graph_objects as go
+
+    # Actuals include ingested days (see equipment_series.py), like the forecasts
+    df = actuals().set_index('Date')
+    lines = forecast_lines(DEFAULT_HORIZON)
+    rus_forecast, ukr_forecast = lines['Russia'], lines['Ukraine']
+
+    fig = go.Figure()
+
+    # Main plot - Cumulative losses (LTTB-downsampled; zooming re-queries the window)
+    rus_x, rus_y = downsampled(df.index, df['Russia_Total'])
+    ukr_x, ukr_y = downsampled(df.index, df['Ukraine_Total'])
+    fig.add_trace(go.Scatter(x=rus_x, y=rus_y, name='Russia Actual',
+                             line=dict(color='#E53935', width=2)))
+    fig.add_trace(go.Scatter(x=ukr_x, y=ukr_y, name='Ukraine Actual',
+                             line=dict(color='#1E88E5', width=2)))
+    fig.add_trace(go.Scatter(x=rus_forecast.index, y=rus_forecast.round(1), name='Russia Forecast',
+                             line=dict(color='#B71C1C', dash='dash')))
+    fig.add_trace(go.Scatter(x=ukr_forecast.index, y=ukr_forecast.round(1), name='Ukraine Forecast',
+                             line=dict(color='#0D47A1', dash='dash')))
+
+    # Add vertical line for forecast start
+    last_date = df.index[-1]
+    fig.add_vline(x=last_date, line=dict(color='gray', dash='dot', width=1.5))
+    fig.add_annotation(x=last_date - pd.Timedelta(days=60), y=0.9, yref='paper',
+                       text='Forecast Start', showarrow=False, font=dict(color='gray'))
+
+    # Add annotation with forecast values
+    last_rus = int(rus_forecast.iloc[-1])
+    last_ukr = int(ukr_forecast.iloc[-1])
+    end_date = rus_forecast.index[-1]
+    fig.add_annotation(x=end_date, y=float(rus_forecast.iloc[-1]),
+                       text=f'Russia: ~{last_rus:,}', showarrow=False, xanchor='left', yshift=10,
+                       bgcolor='#FFEBEE', bordercolor='#B71C1C', borderpad=4, font=dict(color='#B71C1C'))
+    fig.add_annotation(x=end_date, y=float(ukr_forecast.iloc[-1]),
+                       text=f'Ukraine: ~{last_ukr:,}', showarrow=False, xanchor='left', yshift=-25,
+                       bgcolor='#E3F2FD', bordercolor='#0D47A1', borderpad=4, font=dict(color='#0D47A1'))
+
+    # Formatting
+    fig.update_layout(
+        title=dict(text=forecast_title(DEFAULT_HORIZON),
+                   x=0.5, font=dict(size=16)),
+        xaxis_title='Date',
+        yaxis_title='Total Equipment Losses',
+        yaxis_tickformat='~s',
+        legend=dict(x=0.01, y=0.99),
+        template='plotly_white',
+        height=600,
+        margin=dict(l=60, r=140, t=80, b=50),
+        uirevision='forecast',  # keep the user's zoom across zoom and horizon patches
+        # Numbers for the insights box, so a warm start needs only this JSON
+        meta=dict(
+            current_rus=int(df['Russia_Total'].iloc[-1]),
+            current_ukr=int(df['Ukraine_Total'].iloc[-1]),
+            last_rus=last_rus,
+            last_ukr=last_ukr,
+        ),
+    )
+    fig.update_xaxes(showgrid=True, griddash='dash')
+    fig.update_yaxes(showgrid=True, griddash='dash')
+    return fig
+
+
+def actuals():
+    """Equipment totals from the base CSV plus every ingested batch."""
+    return load_series().frame
+
+
+def figure_json():
+    """(cache key, Plotly JSON) of the forecast figure for the current data."""
+    from forecast_service import DEFAULT_ORDER
+    state = load_series().state
+    key = figure_key(FIGURE_SOURCES, version=FIGURE_VERSION,
+                     state=(state['rows'], state['parts'], DEFAULT_ORDER, DEFAULT_HORIZON))
+    return key, cached_figure_json('forecast', key, build_forecast_figure)
+
+
+forecast_key, forecast_json = figure_json()
+insights = json.loads(forecast_json)['layout']['meta']
 
 # Create layout with additional information
+# The figure itself is fetched from /figures/forecast.json by a clientside
+# callback, so it is HTTP-cached instead of inlined in every layout payload.
 forecast_layout = html.Div([
+    dcc.Store(id='forecast-figure-url', data=figure_url('forecast', forecast_key)),
     html.Div([
-        html.Img(src='data:image/png;base64,{}'.format(encoded_img), 
-                style={'width': '100%', 'maxWidth': '1000px', 'display': 'block', 'margin': '0 auto'})
+        dcc.Graph(id='forecast-graph', style={'maxWidth': '1000px', 'margin': '0 auto'})
     ]),
-    
+
+    html.Div([
+        html.Label("Forecast horizon (days):"),
+        dcc.Slider(
+            id='forecast-horizon',
+            min=30, max=365, step=1, value=DEFAULT_HORIZON,
+            marks={d: str(d) for d in (30, 90, 180, 270, 365)},
+            updatemode='drag'
+        ),
+    ], style={'maxWidth': '900px', 'margin': '10px auto'}),
+
     html.Div([
         html.H4("Forecast Insights:", style={'color': '#2c3e50', 'marginTop': '20px'}),
         html.Ul([
-            html.Li(f"Current Russian losses: {int(df['Russia_Total'].iloc[-1]):,}"),
-            html.Li(f"Current Ukrainian losses: {int(df['Ukraine_Total'].iloc[-1]):,}"),
-            html.Li(f"Projected Russian losses in 6 months: ~{last_rus:,}"),
-            html.Li(f"Projected Ukrainian losses in 6 months: ~{last_ukr:,}"),
+            html.Li(f"Current Russian losses: {insights['current_rus']:,}"),
+            html.Li(f"Current Ukrainian losses: {insights['current_ukr']:,}"),
+            html.Li(projected_text('Russian', DEFAULT_HORIZON, insights['last_rus']), id='forecast-projected-rus'),
+            html.Li(projected_text('Ukrainian', DEFAULT_HORIZON, insights['last_ukr']), id='forecast-projected-ukr'),
             html.Li("Forecast based on ARIMA modeling of historical patterns"),
         ], style={'lineHeight': '1.8'}),
-        
+
         html.P("Note: This forecast is based on historical patterns and doesn't account for potential changes in war intensity, strategy, or external factors.",
               style={'fontStyle': 'italic', 'color': '#7f8c8d', 'marginTop': '15px'})
     ], style={'maxWidth': '900px', 'margin': '20px auto', 'padding': '15px', 'backgroundColor': '#f8f9fa', 'borderRadius': '5px'})
-], style={'fontFamily': 'Arial, sans-serif', 'padding': '20px'})
\ No newline at end of file
+], style={'fontFamily': 'Arial, sans-serif', 'padding': '20px'})
+
+
+# --- Callbacks (registered lazily in callbacks.py) ---
+def update_forecast_horizon(horizon):
+    """Redraw the forecast lines for another horizon from the cached ARIMA fits."""
+    lines = forecast_lines(horizon)
+    patched = Patch()
+    projected = {}
+    for trace, annotation, side in ((2, 1, 'Russia'), (3, 2, 'Ukraine')):
+        forecast = lines[side]
+        patched['data'][trace]['x'] = forecast.index.strftime('%Y-%m-%d').tolist()
+        patched['data'][trace]['y'] = forecast.round(1).tolist()
+        patched['layout']['annotations'][annotation]['x'] = forecast.index[-1].strftime('%Y-%m-%d')
+        patched['layout']['annotations'][annotation]['y'] = float(forecast.iloc[-1])
+        patched['layout']['annotations'][annotation]['text'] = f'{side}: ~{int(forecast.iloc[-1]):,}'
+        projected[side] = int(forecast.iloc[-1])
+    patched['layout']['title']['text'] = forecast_title(horizon)
+
+    return (
+        patched,
+        projected_text('Russian', horizon, projected['Russia']),
+        projected_text('Ukrainian', horizon, projected['Ukraine']),
+    )
+
+
+def zoom_forecast(relayout_data):
+    """Full-resolution actuals for the visible window; the forecast lines are short already."""
+    df = actuals()
+    return zoom_patch(relayout_data, [
+        (0, df['Date'], df['Russia_Total']),
+        (1, df['Date'], df['Ukraine_Total']),
+    ])
@@ -1,52 +1,25 @@
 import pandas as pd
-import json
 import plotly.express as px
 import plotly.graph_objects as go
-from dash import html, dcc, Dash
+from dash import html, dcc, Dash, Patch, no_update
+from data_registry import load_dataset
+from geometry import level_for_zoom, load_label_index, load_level, normalize_name
 
 # Load csv
-df = pd.read_csv('../Rus-Ukr-Civilians/ukraine-civilian-preprocessed.csv')
+df = load_dataset('ukraine_civilians')
 
-# Load and verify GeoJSON
-with open('../Rus-Ukr-Civilians/ukraine_oblasts.geojson') as f:
-    geojson = json.load(f)
-
-# Enhanced centroid calculator with validation
-def get_centroid(feature):
-    geom = feature['geometry']
-    if geom['type'] not in ['Polygon', 'MultiPolygon']:
-        raise ValueError(f"Unsupported geometry type: {geom['type']}")
-            
-    coords = geom['coordinates']
-    if geom['type'] == 'MultiPolygon':
-        coords = coords[0]  # Use first polygon for centroid
-            
-    lons, lats = zip(*coords[0])  # Extract first ring coordinates
-    return {
-        "name": feature['properties']['name:en'],
-        "lon": sum(lons)/len(lons),
-        "lat": sum(lats)/len(lats),
-    }
-
-# Calculate centroids with error tracking
-centroids = [get_centroid(f) for f in geojson['features']]
-centroid_df = pd.DataFrame(centroids)
+# Label positions (area-weighted centroids, pole of inaccessibility for
+# concave oblasts) and the name mapping come from geometry's sidecar index
+label_index = load_label_index()
+centroid_df = pd.DataFrame(label_index['labels'])
+centroid_df['name_normalized'] = centroid_df['name'].map(normalize_name)
+name_mapping = label_index['name_mapping']
 
 # Name normalization with case-insensitive matching
-df['Area_normalized'] = df['Area'].str.strip().str.lower()
-centroid_df['name_normalized'] = centroid_df['name'].str.strip().str.lower()
-
-
-# Create mapping with fallbacks
-name_mapping = {
-    'kyiv oblast': 'kiev oblast',
-    'kyiv (city)': 'kiev oblast',  # Map to same coords as oblast
-    'odesa oblast': 'odessa oblast',
-    'zaporizhzhia oblast': 'zaporizhia oblast'
-}
+df = df.assign(Area_normalized=df['Area'].map(normalize_name))
 
 # Apply mapping with verification
-df['Area_mapped'] = df['Area_normalized'].map(name_mapping).fillna(df['Area_normalized'])
+df = df.assign(Area_mapped=df['Area_normalized'].map(name_mapping).fillna(df['Area_normalized']))
 unmapped = df[~df['Area_mapped'].isin(centroid_df['name_normalized'])]
 
 # Merge with validation
@@ -62,18 +35,24 @@ valid_labels = df_merged.dropna(subset=['lon', 'lat'])
 
 
 # Main visualization
+# Boundaries come from a simplified level matched to the zoom; see geometry.py
+INITIAL_ZOOM = 5
+initial_level = level_for_zoom(INITIAL_ZOOM)
+
 main_fig = px.choropleth_mapbox(
     df_merged,
-    geojson=geojson,
+    geojson=load_level(initial_level),
     locations='Area',
     featureidkey='properties.name:en',
     color='Fatalities',
     color_continuous_scale='Reds',
     mapbox_style='carto-positron',
-    zoom=5,
+    zoom=INITIAL_ZOOM,
     center={'lat': 48.5, 'lon': 31.5},
     opacity=0.7
 )
+# Keep the user's view when the boundaries are swapped for another level
+main_fig.update_layout(uirevision='ukraine-map')
 
 # Add labels only for valid points
 if not valid_labels.empty:
@@ -88,11 +67,25 @@ if not valid_labels.empty:
 
 ukraine_map_layout = html.Div([
     html.H2("Ukraine Civilian Fatalities Map"),
-    dcc.Graph(figure=main_fig, style={'height': '100vh'}),  # increased height
+    dcc.Store(id='ukraine-map-level', data=initial_level),
+    dcc.Graph(id='ukraine-map', figure=main_fig, style={'height': '100vh'}),  # increased height
     html.Div([
         html.P("This map shows civilian fatalities in Ukraine by region."),
         html.P("Hover over the regions to see the number of fatalities.")
     ], style={'text-align': 'center'})
 ])
 
-    
\ No newline at end of file
+
+# --- Callback (registered lazily in callbacks.py) ---
+def update_map_detail(relayout_data, current_level):
+    """Swap in boundaries simplified for the new zoom, if it crossed a level."""
+    zoom = (relayout_data or {}).get('mapbox.zoom')
+    if zoom is None:
+        return no_update, no_update
+    level = level_for_zoom(zoom)
+    if level == current_level:
+        return no_update, no_update
+
+    patched = Patch()
+    patched['data'][0]['geojson'] = load_level(level)
+    return patched, level
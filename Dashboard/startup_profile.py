@@ -0,0 +1,207 @@
+# startup_profile.py
+# Where the dashboard's cold-start time goes.
+#
+# app.py calls install() before anything else, then boot_finished() once the
+# server is ready. In between, a sys.meta_path hook times every module import
+# with its own and its dependencies' time. Data loaders and figure builders
+# decorated with @profiled(kind), and blocks wrapped in timed(kind, name), are
+# recorded with the import or call they ran inside. A section's import time
+# therefore breaks down into its dependencies, its data loads, its figure
+# builds and the rest of its module code (inline figures and frames).
+#
+# Sections are imported when their tab is first opened, so their entries keep
+# arriving after boot (phase 'lazy'). Profiled calls made later, from
+# callbacks outside any import, are not recorded.
+#
+# boot_finished() writes the report to REPORT_PATH and appends a one-line
+# summary to HISTORY_PATH, so cold starts can be compared across data
+# refreshes. register_routes() serves the live report at /debug/startup to
+# local requests only.
+import functools
+import importlib.abc
+import importlib.machinery
+import itertools
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+REPORT_PATH = 'startup_profile.json'
+HISTORY_PATH = 'startup_history.jsonl'
+SLOWEST = 25
+
+_events = []
+_ids = itertools.count(1)
+_local = threading.local()
+_state = {'installed': False, 'phase': 'boot', 'start': None, 'boot_ms': None}
+
+# Loaders created per module by the path finders; shared ones (builtins,
+# frozen, zip) are left alone
+_PER_MODULE_LOADERS = (
+    importlib.machinery.SourceFileLoader,
+    importlib.machinery.SourcelessFileLoader,
+    importlib.machinery.ExtensionFileLoader,
+)
+
+
+def _stack():
+    if not hasattr(_local, 'stack'):
+        _local.stack = []
+    return _local.stack
+
+
+@contextmanager
+def timed(kind, name):
+    """Record the wall time of the block as a ``kind`` event (import, data, figure, layout)."""
+    stack = _stack()
+    if not _state['installed'] or (kind != 'import' and _state['phase'] != 'boot' and not stack):
+        yield
+        return
+    parent = stack[-1] if stack else None
+    event = {'id': next(_ids), 'kind': kind, 'name': name, 'phase': _state['phase'],
+             'parent': parent['id'] if parent else None, 'child_ms': 0.0}
+    stack.append(event)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        ms = (time.perf_counter() - start) * 1000
+        stack.pop()
+        event['ms'] = round(ms, 2)
+        event['self_ms'] = round(ms - event.pop('child_ms'), 2)
+        if parent is not None:
+            parent['child_ms'] += ms
+        _events.append(event)
+
+
+def _short(value):
+    return value.__qualname__ if callable(value) and hasattr(value, '__qualname__') else repr(value)
+
+
+def profiled(kind):
+    """Decorator recording each call as a ``kind`` event named after the function and its arguments.
+
+    Put it under @lru_cache so only real loads are recorded.
+    """
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            arguments = ', '.join([_short(a) for a in args] + [f'{k}={_short(v)}' for k, v in kwargs.items()])
+            with timed(kind, f'{func.__qualname__}({arguments[:60]})'):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# --- Import timing ---
+
+class _ImportTimer(importlib.abc.MetaPathFinder):
+    """Finds specs through the other finders and times their loader's exec_module."""
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        if isinstance(spec.loader, _PER_MODULE_LOADERS):
+            exec_module = spec.loader.exec_module
+
+            def timed_exec(module):
+                with timed('import', fullname):
+                    exec_module(module)
+            spec.loader.exec_module = timed_exec
+        return spec
+
+
+def install():
+    """Start recording; call before the app's other imports."""
+    if _state['installed']:
+        return
+    _state.update(installed=True, phase='boot', start=time.perf_counter())
+    sys.meta_path.insert(0, _ImportTimer())
+
+
+def _summary(events):
+    top = [e for e in events if e['parent'] is None]
+    totals = {}
+    for e in top:
+        key = f"{e['kind']}_ms"
+        totals[key] = round(totals.get(key, 0) + e['ms'], 2)
+    return totals
+
+
+def report():
+    """The profile so far: boot totals, per-section breakdown, slowest imports, loads and builds."""
+    events = list(_events)
+    children = {}
+    for e in events:
+        children.setdefault(e['parent'], []).append(e)
+
+    def add_breakdown(event, breakdown):
+        # Nested imports count whole; other events by their own time, so a
+        # load inside a figure build counts as data, not figure
+        for child in children.get(event['id'], []):
+            if child['kind'] == 'import':
+                breakdown['imports_ms'] = round(breakdown.get('imports_ms', 0) + child['ms'], 2)
+            else:
+                key = f"{child['kind']}_ms"
+                breakdown[key] = round(breakdown.get(key, 0) + child['self_ms'], 2)
+                add_breakdown(child, breakdown)
+        return breakdown
+
+    sections = {}
+    for e in events:
+        if e['kind'] == 'import' and e['name'].startswith('sections.'):
+            breakdown = add_breakdown(e, {'module_code_ms': e['self_ms']})
+            sections[e['name']] = {'ms': e['ms'], 'phase': e['phase'], **breakdown}
+
+    def listed(kind):
+        return [{k: e[k] for k in ('name', 'ms', 'phase')} for e in events if e['kind'] == kind]
+
+    imports = sorted((e for e in events if e['kind'] == 'import'), key=lambda e: e['self_ms'], reverse=True)
+    return {
+        'python': platform.python_version(),
+        'boot_ms': _state['boot_ms'],
+        'boot': _summary([e for e in events if e['phase'] == 'boot']),
+        'lazy': _summary([e for e in events if e['phase'] == 'lazy']),
+        'sections': sections,
+        'slowest_imports': [{'name': e['name'], 'self_ms': e['self_ms'], 'ms': e['ms']}
+                            for e in imports[:SLOWEST]],
+        'data_loads': listed('data'),
+        'figure_builds': listed('figure'),
+        'layout': listed('layout'),
+    }
+
+
+def boot_finished(path=REPORT_PATH, history_path=HISTORY_PATH):
+    """Mark the end of boot and write the report; returns it."""
+    if not _state['installed']:
+        return None
+    _state['boot_ms'] = round((time.perf_counter() - _state['start']) * 1000, 2)
+    _state['phase'] = 'lazy'
+    result = report()
+    with open(path + '.tmp', 'w') as f:
+        json.dump(result, f, indent=2)
+    os.replace(path + '.tmp', path)
+    with open(history_path, 'a') as f:
+        f.write(json.dumps({'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                            'boot_ms': result['boot_ms'], **result['boot']}) + '\n')
+    return result
+
+
+def register_routes(server):
+    from flask import abort, jsonify, request
+
+    @server.route('/debug/startup')
+    def startup_report():
+        # Local debugging only; proxied requests carry X-Forwarded-For
+        if request.remote_addr not in ('127.0.0.1', '::1') or 'X-Forwarded-For' in request.headers:
+            abort(404)
+        return jsonify(report())
@@ -1,49 +1,21 @@
 import pandas as pd
-import json
 import plotly.express as px
 import plotly.graph_objects as go
 from dash import html, dcc, Dash
+from geometry import load_label_index, load_level, normalize_name
 
 # Load csv
 df = pd.read_csv('../Rus-Ukr-Civilians/ukraine-civilian-preprocessed.csv')
 
-# Load and verify GeoJSON
-with open('../Rus-Ukr-Civilians/ukraine_oblasts.geojson') as f:
-    geojson = json.load(f)
-
-# Enhanced centroid calculator with validation
-def get_centroid(feature):
-    geom = feature['geometry']
-    if geom['type'] not in ['Polygon', 'MultiPolygon']:
-        raise ValueError(f"Unsupported geometry type: {geom['type']}")
-            
-    coords = geom['coordinates']
-    if geom['type'] == 'MultiPolygon':
-        coords = coords[0]  # Use first polygon for centroid
-            
-    lons, lats = zip(*coords[0])  # Extract first ring coordinates
-    return {
-        "name": feature['properties']['name:en'],
-        "lon": sum(lons)/len(lons),
-        "lat": sum(lats)/len(lats),
-    }
-
-# Calculate centroids with error tracking
-centroids = [get_centroid(f) for f in geojson['features']]
-centroid_df = pd.DataFrame(centroids)
+# Label positions (area-weighted centroids, pole of inaccessibility for
+# concave oblasts) and the name mapping come from geometry's sidecar index
+label_index = load_label_index()
+centroid_df = pd.DataFrame(label_index['labels'])
+centroid_df['name_normalized'] = centroid_df['name'].map(normalize_name)
+name_mapping = label_index['name_mapping']
 
 # Name normalization with case-insensitive matching
-df['Area_normalized'] = df['Area'].str.strip().str.lower()
-centroid_df['name_normalized'] = centroid_df['name'].str.strip().str.lower()
-
-
-# Create mapping with fallbacks
-name_mapping = {
-    'kyiv oblast': 'kiev oblast',
-    'kyiv (city)': 'kiev oblast',  # Map to same coords as oblast
-    'odesa oblast': 'odessa oblast',
-    'zaporizhzhia oblast': 'zaporizhia oblast'
-}
+df['Area_normalized'] = df['Area'].map(normalize_name)
 
 # Apply mapping with verification
 df['Area_mapped'] = df['Area_normalized'].map(name_mapping).fillna(df['Area_normalized'])
@@ -64,7 +36,7 @@ valid_labels = df_merged.dropna(subset=['lon', 'lat'])
 # Main visualization
 main_fig = px.choropleth_mapbox(
     df_merged,
-    geojson=geojson,
+    geojson=load_level('low'),
     locations='Area',
     featureidkey='properties.name:en',
     color='Fatalities',
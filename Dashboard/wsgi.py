@@ -0,0 +1,85 @@
+# wsgi.py
+# Production entry point for prefork WSGI servers.
+#
+#   cd Dashboard && gunicorn -c gunicorn.conf.py "wsgi:create_app()"
+#
+# app.py's `app.run(debug=True)` is for development only. create_app() returns
+# the Flask server behind the Dash app after preloading everything the tabs
+# would otherwise build lazily on first use:
+#   - every section module (its data, figures and layout),
+#   - the rollup levels, the map geometry levels and the forecast fits,
+#   - the Russian losses figures for every aggregation level.
+# With gunicorn's preload_app this runs once in the master. Workers then share
+# the result copy-on-write. The datasets and the derived equipment series are
+# memory-mapped Arrow (see data_registry.read_arrow and share): their columns
+# live in shared file pages, apart from the Python objects around them, so
+# reference count updates in a worker never copy them. Other preloaded NumPy
+# arrays are marked read-only, so an in-place write raises instead of silently
+# copying pages in one worker. gc.freeze() moves everything loaded so far out
+# of the collector's reach, so garbage collections in the workers do not write
+# to (and so copy) those pages either.
+import gc
+import importlib
+import types
+
+import numpy as np
+import pandas as pd
+
+from data_registry import freeze
+
+_server = None
+
+
+def _freeze_value(value):
+    if isinstance(value, pd.DataFrame):
+        # Not consolidated: that would copy memory-mapped columns onto the heap
+        freeze(value)
+    elif isinstance(value, pd.Series) and isinstance(value.values, np.ndarray):
+        value.values.flags.writeable = False
+    elif isinstance(value, np.ndarray):
+        value.flags.writeable = False
+
+
+def _freeze_module(module):
+    # Module-level frames and arrays, and those held by module-level objects
+    # (e.g. the AidCube's tables)
+    for value in vars(module).values():
+        _freeze_value(value)
+        if hasattr(value, '__dict__') and not isinstance(value, types.ModuleType) and not callable(value):
+            for attr in vars(value).values():
+                _freeze_value(attr)
+
+
+def preload():
+    """Import every section and build the data the callbacks read lazily."""
+    from layout import TABS, render_tab
+    for value, _, module_name, _ in TABS:
+        render_tab(value)
+        _freeze_module(importlib.import_module(module_name))
+
+    import geometry
+    import rollups
+    from forecast_service import SIDES, forecast_side
+    from sections.forecast_layout import DEFAULT_HORIZON
+    from sections.russian_losses import level_figures
+    for name in rollups.SERIES:
+        for frame in rollups.levels(name).values():
+            _freeze_value(frame)
+    for level in geometry.LEVELS:
+        geometry.load_level(level)
+    for side in SIDES:
+        forecast_side(side, DEFAULT_HORIZON)
+    for level in rollups.LEVELS:
+        level_figures(level)
+
+
+def create_app(preload_data=True):
+    """The WSGI application (Flask server) with all section data preloaded."""
+    global _server
+    if _server is None:
+        import app
+        if preload_data:
+            preload()
+            gc.freeze()
+        _server = app.app.server
+    return _server
@@ -1,35 +1,16 @@
+import sys
+
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 
 # --- Load Dataset ---
-df = pd.read_csv('financialaid.csv')
-
-# --- Data Cleaning ---
-money_columns = [
-    'tot_activity_value', 'tot_activity_value_EUR', 'tot_activity_value_constant_currency',
-    'tot_sub_activity_value', 'tot_sub_activity_value_EUR', 'tot_sub_activity_value_constant_currency',
-    'tot_sub_activity_value_constant_currency_redistr', 'tot_sub_activity_value_EUR_redistr',
-    'tot_value_deliv_EUR', 'tot_sub_activity_value_EUR_OLD',
-    'item_price_USD', 'item_value_estimate_USD', 'item_value_estimate_deliv_USD'
-]
-
-for col in money_columns:
-    if col in df.columns:
-        df[col] = df[col].astype(str).str.replace(',', '').str.strip()
-        df[col] = df[col].replace(['.', '', 'nan', 'NaN'], pd.NA)
-        df[col] = pd.to_numeric(df[col], errors='coerce')
-
-df['announcement_date'] = pd.to_datetime(df['announcement_date'], errors='coerce')
-df = df.dropna(subset=['donor', 'tot_activity_value_EUR', 'announcement_date'])
-
-df['aid_type_general'] = df['aid_type_general'].astype(str).str.strip().str.title()
-df['aid_type_general'] = df['aid_type_general'].replace(['Nan', ''], pd.NA)
+# Cleaning (money columns, categoricals, dates, dropped incomplete rows) is
+# declared once in the dashboard's data registry and cached as Arrow IPC
+sys.path.insert(0, '../Dashboard')
+from data_registry import load_dataset
 
-categorical_cols = ['donor', 'aid_type_general', 'aid_type_specific']
-for col in categorical_cols:
-    if col in df.columns:
-        df[col] = df[col].astype('category')
+df = load_dataset('financial_aid').copy()
 
 df['year_month'] = df['announcement_date'].dt.to_period('M')
 df['month'] = df['announcement_date'].dt.month_name()
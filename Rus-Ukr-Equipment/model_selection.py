@@ -0,0 +1,174 @@
+# model_selection.py
+# Parallel ARIMA / seasonal ARIMA order search for the equipment loss series.
+#
+# The differencing order d is fixed before the search, by repeated augmented
+# Dickey-Fuller tests (choose_d): AIC/BIC are likelihoods of the differenced
+# data, so models with different d cannot be ranked against each other.
+#
+# Candidates are fitted on a process pool, one complexity level at a time
+# (level = p + q + P + Q). A candidate is only tried when one of its simpler
+# neighbours (one AR/MA term fewer) scored within `prune_delta` of the best
+# AIC/BIC seen so far. Early stopping is opt-in: with `min_improvement` set,
+# the search ends after `patience` consecutive levels that each fail to improve
+# the best score by that much. Every fit's wall-clock time is recorded so the
+# grid can be sized for the hardware.
+import itertools
+import math
+import multiprocessing
+import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from statsmodels.tsa.arima.model import ARIMA
+from statsmodels.tsa.stattools import adfuller
+
+# (p, q) pairs; d comes from choose_d
+DEFAULT_ORDERS = list(itertools.product(range(4), range(4)))
+# Non-seasonal, plus weekly seasonality for the daily series
+DEFAULT_SEASONAL_ORDERS = [(0, 0, 0, 0), (1, 0, 0, 7), (0, 0, 1, 7), (1, 0, 1, 7)]
+
+
+def _fit_candidate(series, order, seasonal_order):
+    """Fit one candidate in a worker; returns scores only (results objects are large)."""
+    start = time.perf_counter()
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            fit = ARIMA(series, order=order, seasonal_order=seasonal_order).fit()
+        aic, bic, error = fit.aic, fit.bic, None
+    except Exception as exc:  # non-stationary / non-invertible starts, LinAlgError, ...
+        aic = bic = float('inf')
+        error = f'{type(exc).__name__}: {exc}'
+    return {
+        'order': order,
+        'seasonal_order': seasonal_order,
+        'aic': aic,
+        'bic': bic,
+        'seconds': time.perf_counter() - start,
+        'error': error,
+    }
+
+
+def make_pool(max_workers=None):
+    """Process pool for model fits.
+
+    fork keeps the notebook-style scripts in this folder from being re-run
+    by every worker on import (spawn re-executes __main__).
+    """
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('fork') if 'fork' in methods else None
+    return ProcessPoolExecutor(max_workers=max_workers or os.cpu_count(), mp_context=context)
+
+
+def choose_d(series, max_d=2, alpha=0.05):
+    """Smallest d for which an ADF test rejects a unit root in the d-times differenced series."""
+    values = pd.Series(series).astype('float64')
+    for d in range(max_d):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            p_value = adfuller(values.dropna(), autolag='AIC')[1]
+        if p_value < alpha:
+            return d
+        values = values.diff()
+    return max_d
+
+
+def _complexity(order, seasonal_order):
+    return order[0] + order[2] + seasonal_order[0] + seasonal_order[2]
+
+
+def _parents(order, seasonal_order):
+    """Candidates with exactly one AR or MA term fewer."""
+    p, d, q = order
+    P, D, Q, s = seasonal_order
+    parents = []
+    if p:
+        parents.append(((p - 1, d, q), seasonal_order))
+    if q:
+        parents.append(((p, d, q - 1), seasonal_order))
+    # A seasonal order with no terms left is written with period 0
+    if P:
+        parents.append((order, (P - 1, D, Q, s if P - 1 or D or Q else 0)))
+    if Q:
+        parents.append((order, (P, D, Q - 1, s if P or D or Q - 1 else 0)))
+    return parents
+
+
+class SearchResult:
+    def __init__(self, order, seasonal_order, criterion, fit, candidates, wall_time):
+        self.order = order
+        self.seasonal_order = seasonal_order
+        self.criterion = criterion
+        self.fit = fit
+        self.candidates = candidates
+        self.wall_time = wall_time
+
+    def summary(self):
+        tried = self.candidates['error'].isna().sum()
+        return (f"best ARIMA{self.order}x{self.seasonal_order} "
+                f"{self.criterion.upper()}={getattr(self.fit, self.criterion):.1f} "
+                f"({tried} fits, {len(self.candidates) - tried} failed, {self.wall_time:.1f}s wall)")
+
+
+def search_orders(series, orders=DEFAULT_ORDERS, seasonal_orders=DEFAULT_SEASONAL_ORDERS, d=None,
+                  criterion='aic', max_workers=None, prune_delta=10.0, min_improvement=None, patience=2):
+    """Pick the ARIMA order with the lowest AIC/BIC for ``series``.
+
+    ``orders`` are (p, q) pairs; every candidate uses the same ``d``, by
+    default choose_d(series). Returns a SearchResult with the refitted best
+    model and a ``candidates`` frame (one row per fitted candidate, with its
+    score and fit time).
+    """
+    if criterion not in ('aic', 'bic'):
+        raise ValueError(f"criterion must be 'aic' or 'bic', not {criterion!r}")
+    if d is None:
+        d = choose_d(series)
+
+    grid = [((p, d, q), tuple(so)) for p, q in orders for so in seasonal_orders]
+    levels = {}
+    for candidate in grid:
+        levels.setdefault(_complexity(*candidate), []).append(candidate)
+
+    scores = {}
+    fitted = []
+    best = float('inf')
+    stalled = 0
+    first_level = min(levels)
+    start = time.perf_counter()
+    with make_pool(max_workers) as pool:
+        for level in sorted(levels):
+            todo = []
+            for candidate in levels[level]:
+                parents = [scores[p] for p in _parents(*candidate) if p in scores]
+                if level == first_level or any(s <= best + prune_delta for s in parents):
+                    todo.append(candidate)
+            if not todo:
+                break
+
+            futures = [pool.submit(_fit_candidate, series, *c) for c in todo]
+            results = [f.result() for f in futures]
+            fitted.extend(results)
+            for r in results:
+                scores[(r['order'], r['seasonal_order'])] = r[criterion]
+            level_best = min(r[criterion] for r in results)
+            if min_improvement is not None and level != first_level:
+                stalled = 0 if level_best < best - min_improvement else stalled + 1
+                if stalled >= patience:
+                    break
+            best = min(best, level_best)
+    wall_time = time.perf_counter() - start
+
+    candidates = pd.DataFrame(fitted).sort_values(criterion, ignore_index=True)
+    # Failed fits score inf; degenerate series can also "fit" with a NaN score
+    if not candidates[criterion].map(math.isfinite).any():
+        name = getattr(series, 'name', None) or 'series'
+        errors = candidates['error'].dropna()
+        detail = f"first error: {errors.iloc[0]}" if len(errors) else f"no finite {criterion.upper()}"
+        raise ValueError(f"no candidate ARIMA order could be fitted to {name!r} ({len(candidates)} tried; {detail})")
+    order, seasonal_order = candidates.loc[0, 'order'], candidates.loc[0, 'seasonal_order']
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        fit = ARIMA(series, order=order, seasonal_order=seasonal_order).fit()
+    return SearchResult(order, seasonal_order, criterion, fit, candidates, wall_time)